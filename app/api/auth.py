@@ -7,6 +7,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.orm import undefer
 
 from app.database import get_db
 from app.models import AdminUser, Tenant
@@ -14,6 +15,7 @@ from app.schemas import LoginRequest, LoginResponse, AdminUserCreate, AdminUserR
 from app.core import (
     verify_password,
     get_password_hash,
+    password_needs_rehash,
     create_access_token,
     verify_access_token,
     settings
@@ -55,7 +57,9 @@ async def get_current_admin(
 async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
     """Login de administrador"""
     result = await db.execute(
-        select(AdminUser).where(AdminUser.email == request.email)
+        select(AdminUser)
+        .options(undefer(AdminUser.hashed_password))
+        .where(AdminUser.email == request.email)
     )
     admin = result.scalar_one_or_none()
 
@@ -71,6 +75,10 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
             detail="Account is disabled"
         )
 
+    # Migra hash bcrypt legado para argon2id apos login bem-sucedido
+    if password_needs_rehash(admin.hashed_password):
+        admin.hashed_password = get_password_hash(request.password)
+
     # Atualiza último login
     admin.last_login_at = datetime.utcnow()
     await db.commit()
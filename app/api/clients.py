@@ -4,13 +4,16 @@ CRUD de clientes (empresas que compram licenças)
 """
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
+from sqlalchemy.orm import selectinload, undefer
 
 from app.database import get_db
-from app.models import Client, AdminUser
+from app.models import Client, License, AdminUser
 from app.schemas import ClientCreate, ClientUpdate, ClientResponse
 from app.api.auth import get_current_admin
+from app.core import PydanticJSONResponse
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
@@ -25,7 +28,8 @@ async def list_clients(
     admin: AdminUser = Depends(get_current_admin)
 ):
     """Lista todos os clientes"""
-    query = select(Client)
+    # licenses_count vem como subquery no próprio SELECT (uma ida ao banco)
+    query = select(Client).options(undefer(Client.licenses_count))
 
     if search:
         query = query.where(
@@ -44,7 +48,8 @@ async def list_clients(
     result = await db.execute(query)
     clients = result.scalars().all()
 
-    return [c.to_dict() for c in clients]
+    # Resposta pronta: sem revalidar cada linha no ClientResponse
+    return ORJSONResponse([c.to_dict() for c in clients])
 
 
 @router.get("/{client_id}", response_model=ClientResponse)
@@ -55,7 +60,9 @@ async def get_client(
 ):
     """Retorna um cliente específico"""
     result = await db.execute(
-        select(Client).where(Client.id == client_id)
+        select(Client)
+        .options(undefer(Client.licenses_count))
+        .where(Client.id == client_id)
     )
     client = result.scalar_one_or_none()
 
@@ -65,7 +72,7 @@ async def get_client(
             detail="Client not found"
         )
 
-    return client.to_dict()
+    return PydanticJSONResponse(ClientResponse.model_validate(client.to_dict()))
 
 
 @router.post("", response_model=ClientResponse, status_code=status.HTTP_201_CREATED)
@@ -99,9 +106,9 @@ async def create_client(
     client = Client(**request.model_dump())
     db.add(client)
     await db.commit()
-    await db.refresh(client)
+    await db.refresh(client, ["licenses_count"])
 
-    return client.to_dict()
+    return PydanticJSONResponse(ClientResponse.model_validate(client.to_dict()), status_code=status.HTTP_201_CREATED)
 
 
 @router.put("/{client_id}", response_model=ClientResponse)
@@ -140,9 +147,9 @@ async def update_client(
         setattr(client, field, value)
 
     await db.commit()
-    await db.refresh(client)
+    await db.refresh(client, ["licenses_count"])
 
-    return client.to_dict()
+    return PydanticJSONResponse(ClientResponse.model_validate(client.to_dict()))
 
 
 @router.delete("/{client_id}")
@@ -158,7 +165,7 @@ async def delete_client(
     - permanent=True: EXCLUI TUDO - banco de dados do tenant, usuário PostgreSQL,
       tenant, licenças e cliente. Operação irreversível!
     """
-    from app.models import License, Tenant
+    from app.models import Tenant
     from app.models.subscription import PaymentTransaction
     import asyncpg
     import logging
@@ -166,9 +173,14 @@ async def delete_client(
 
     logger = logging.getLogger(__name__)
 
-    result = await db.execute(
-        select(Client).where(Client.id == client_id)
-    )
+    query = select(Client).where(Client.id == client_id)
+    if permanent:
+        # A exclusão percorre licenças e validações; os relacionamentos não
+        # carregam sozinhos (lazy="raise_on_sql"), então vêm junto aqui.
+        query = query.options(
+            selectinload(Client.licenses).selectinload(License.validations)
+        )
+    result = await db.execute(query)
     client = result.scalar_one_or_none()
 
     if not client:
@@ -5,15 +5,16 @@ CRUD e gerenciamento de licenças
 from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
 from app.database import get_db
 from app.models import License, Client, AdminUser, LicenseStatus, LicenseValidation
-from app.schemas import LicenseCreate, LicenseUpdate, LicenseResponse
+from app.schemas import LicenseCreate, LicenseUpdate, LicenseResponse, LicenseDict
 from app.api.auth import get_current_admin
-from app.core import generate_license_key, rsa_manager
+from app.core import generate_license_key, rsa_manager, MsgspecJSONResponse, PydanticJSONResponse
 
 # Limites por plano
 PLAN_LIMITS = {
@@ -62,7 +63,11 @@ async def list_licenses(
     admin: AdminUser = Depends(get_current_admin)
 ):
     """Lista todas as licenças"""
-    query = select(License).options(selectinload(License.client))
+    query = select(License).options(
+        selectinload(License.client),
+        undefer(License.sql_is_valid),
+        undefer(License.sql_days_until_expiry),
+    )
 
     if search:
         query = query.where(
@@ -86,7 +91,8 @@ async def list_licenses(
     result = await db.execute(query)
     licenses = result.scalars().all()
 
-    return [lic.to_dict() for lic in licenses]
+    # Resposta pronta (msgspec): o response_model fica só para a documentação
+    return MsgspecJSONResponse([LicenseDict.from_license(lic) for lic in licenses])
 
 
 @router.get("/{license_id}", response_model=LicenseResponse)
@@ -109,7 +115,7 @@ async def get_license(
             detail="License not found"
         )
 
-    return license.to_dict()
+    return PydanticJSONResponse(LicenseResponse.model_validate(license.to_dict()))
 
 
 @router.post("", response_model=LicenseResponse, status_code=status.HTTP_201_CREATED)
@@ -187,7 +193,7 @@ async def create_license(
     )
     license = result.scalar_one()
 
-    return license.to_dict()
+    return PydanticJSONResponse(LicenseResponse.model_validate(license.to_dict()), status_code=status.HTTP_201_CREATED)
 
 
 @router.put("/{license_id}", response_model=LicenseResponse)
@@ -251,7 +257,7 @@ async def update_license(
     await db.commit()
     await db.refresh(license)
 
-    return license.to_dict()
+    return PydanticJSONResponse(LicenseResponse.model_validate(license.to_dict()))
 
 
 @router.post("/{license_id}/revoke")
@@ -347,7 +353,9 @@ async def download_license_file(
 ):
     """Download do arquivo de licença (para enviar ao cliente)"""
     result = await db.execute(
-        select(License).where(License.id == license_id)
+        select(License)
+        .options(selectinload(License.client))
+        .where(License.id == license_id)
     )
     license = result.scalar_one_or_none()
 
@@ -395,4 +403,4 @@ async def get_license_validations(
     )
     validations = result.scalars().all()
 
-    return [v.to_dict() for v in validations]
+    return ORJSONResponse([v.to_dict() for v in validations])
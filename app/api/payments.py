@@ -17,11 +17,13 @@ import logging
 import hmac
 import hashlib
 from datetime import datetime, timedelta
+from decimal import Decimal
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Header, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update
-from pydantic import BaseModel
+from sqlalchemy.orm import selectinload
+from pydantic import BaseModel, TypeAdapter
 
 # SDK do Mercado Pago
 import mercadopago
@@ -80,6 +82,11 @@ class PaymentHistoryResponse(BaseModel):
     created_at: str
 
 
+# Listas validadas e serializadas numa chamada só do pydantic-core
+_PLAN_LIST = TypeAdapter(List[PlanResponse])
+_HISTORY_LIST = TypeAdapter(List[PaymentHistoryResponse])
+
+
 # ============================================================
 # INICIALIZAÇÃO DOS PLANOS
 # ============================================================
@@ -123,9 +130,9 @@ async def ensure_plans_exist(db: AsyncSession):
                 name=plan_data["name"],
                 description=plan_data.get("description", f"Assinatura por {plan_data['days']} dias"),
                 days=plan_data["days"],
-                price=plan_data["price"],
-                original_price=plan_data.get("original_price"),
-                discount_percent=plan_data.get("discount_percent", 0),
+                price=Decimal(str(plan_data["price"])),
+                original_price=Decimal(str(plan_data["original_price"])) if plan_data.get("original_price") is not None else None,
+                discount_percent=Decimal(str(plan_data.get("discount_percent", 0))),
                 is_featured=plan_data.get("is_featured", False),
                 sort_order=plan_data.get("sort_order", 0),
                 is_active=True
@@ -167,20 +174,24 @@ async def list_plans(
     )
     plans = result.scalars().all()
 
-    return [
-        PlanResponse(
-            id=p.id,
-            code=p.code,
-            name=p.name,
-            description=p.description,
-            days=p.days,
-            price=p.price,
-            original_price=p.original_price,
-            discount_percent=p.discount_percent or 0,
-            is_featured=p.is_featured or False
-        )
+    rows = [
+        {
+            "id": p.id,
+            "code": p.code,
+            "name": p.name,
+            "description": p.description,
+            "days": p.days,
+            "price": p.price,
+            "original_price": p.original_price,
+            "discount_percent": p.discount_percent or 0,
+            "is_featured": p.is_featured or False,
+        }
         for p in plans
     ]
+    return Response(
+        content=_PLAN_LIST.dump_json(_PLAN_LIST.validate_python(rows)),
+        media_type="application/json",
+    )
 
 
 @router.post("/create-preference", response_model=CreatePreferenceResponse)
@@ -509,24 +520,29 @@ async def get_payment_history(
     # Busca transações
     result = await db.execute(
         select(PaymentTransaction)
+        .options(selectinload(PaymentTransaction.plan))
         .where(PaymentTransaction.tenant_id == tenant.id)
         .order_by(PaymentTransaction.created_at.desc())
     )
     transactions = result.scalars().all()
 
-    return [
-        PaymentHistoryResponse(
-            id=t.id,
-            plan_name=t.plan.name if t.plan else None,
-            amount=t.amount,
-            days_purchased=t.days_purchased,
-            status=t.status,
-            payment_method=t.payment_method,
-            paid_at=t.paid_at.isoformat() if t.paid_at else None,
-            created_at=t.created_at.isoformat() if t.created_at else ""
-        )
+    rows = [
+        {
+            "id": t.id,
+            "plan_name": t.plan.name if t.plan else None,
+            "amount": t.amount,
+            "days_purchased": t.days_purchased,
+            "status": t.status,
+            "payment_method": t.payment_method,
+            "paid_at": t.paid_at.isoformat() if t.paid_at else None,
+            "created_at": t.created_at.isoformat() if t.created_at else "",
+        }
         for t in transactions
     ]
+    return Response(
+        content=_HISTORY_LIST.dump_json(_HISTORY_LIST.validate_python(rows)),
+        media_type="application/json",
+    )
 
 
 @router.get("/status/{transaction_id}")
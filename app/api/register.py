@@ -315,9 +315,7 @@ async def register_trial(
 
     # 3. Gera dados do tenant
     # Constraints compostas (coluna, product_code) permitem mesmo documento em produtos diferentes
-    tenant_code = Tenant.generate_tenant_code(request.document)
-    database_name = Tenant.generate_database_name(request.document)
-    database_user = Tenant.generate_database_user(request.document)
+    tenant_code, database_name, database_user = Tenant.generate_identifiers(request.document)
     database_password = Tenant.generate_database_password()
 
     logger.info(f"Tenant code gerado: {tenant_code} (produto: {request.product_code})")
@@ -4,8 +4,10 @@ Dashboard e estatísticas para admin
 """
 from datetime import datetime, timedelta
 from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
 
 from app.database import get_db
 from app.models import License, Client, LicenseValidation, AdminUser, LicenseStatus
@@ -118,6 +120,7 @@ async def get_expiring_licenses(
 
     result = await db.execute(
         select(License)
+        .options(selectinload(License.client))
         .where(
             License.status == LicenseStatus.ACTIVE.value,
             License.expires_at <= future_date,
@@ -127,7 +130,7 @@ async def get_expiring_licenses(
     )
     licenses = result.scalars().all()
 
-    return [lic.to_dict() for lic in licenses]
+    return ORJSONResponse([lic.to_dict() for lic in licenses])
 
 
 @router.get("/validations/recent")
@@ -144,7 +147,7 @@ async def get_recent_validations(
     )
     validations = result.scalars().all()
 
-    return [v.to_dict() for v in validations]
+    return ORJSONResponse([v.to_dict() for v in validations])
 
 
 @router.get("/validations/failed")
@@ -166,4 +169,4 @@ async def get_failed_validations(
     )
     validations = result.scalars().all()
 
-    return [v.to_dict() for v in validations]
+    return ORJSONResponse([v.to_dict() for v in validations])
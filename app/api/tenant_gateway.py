@@ -18,6 +18,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+import asyncio
 import asyncpg
 import jwt
 import json
@@ -543,16 +544,101 @@ async def ensure_customer_columns(conn: asyncpg.Connection, tenant_code: str = "
         _customer_cols_ensured.add(tenant_code)
 
 
-async def get_tenant_connection(tenant: Tenant) -> asyncpg.Connection:
-    """Cria conexao com banco do tenant"""
-    try:
-        conn = await asyncpg.connect(
-            host=tenant.database_host or settings.POSTGRES_HOST,
-            port=tenant.database_port or settings.POSTGRES_PORT,
-            user=tenant.database_user,
-            password=tenant.database_password,
-            database=tenant.database_name
+class TenantConnection:
+    """
+    Conexao emprestada do pool do tenant.
+
+    Repassa tudo para a conexao asyncpg; close() devolve a conexao ao pool
+    em vez de fecha-la, entao os handlers continuam com o mesmo
+    `finally: await conn.close()`.
+    """
+
+    __slots__ = ('_pool', '_conn')
+
+    def __init__(self, pool: asyncpg.Pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    async def close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await self._pool.release(conn)
+
+
+# Pool asyncpg por tenant (por processo): evita conectar + autenticar no
+# Postgres a cada requisicao. Sem conexoes minimas, e as ociosas fecham
+# sozinhas, para tenants parados nao segurarem conexoes.
+TENANT_POOL_MAX_SIZE = 10
+TENANT_POOL_IDLE_SECONDS = 300
+# Mesmo limite do asyncpg.connect de antes: estourou, cai no 503
+TENANT_POOL_ACQUIRE_TIMEOUT = 60
+_tenant_pools: dict = {}
+# Fechamentos de pools antigos em andamento (referencia evita que o
+# task seja coletado antes de terminar)
+_closing_pools: set = set()
+_tenant_pools_lock = asyncio.Lock()
+
+
+async def _get_tenant_pool(tenant: Tenant) -> asyncpg.Pool:
+    params = (
+        tenant.database_host or settings.POSTGRES_HOST,
+        tenant.database_port or settings.POSTGRES_PORT,
+        tenant.database_user,
+        tenant.database_password,
+        tenant.database_name,
+    )
+    entry = _tenant_pools.get(tenant.tenant_code)
+    if entry is not None and entry[0] == params:
+        return entry[1]
+
+    async with _tenant_pools_lock:
+        entry = _tenant_pools.get(tenant.tenant_code)
+        if entry is not None and entry[0] == params:
+            return entry[1]
+        host, port, user, password, database = params
+        pool = await asyncpg.create_pool(
+            host=host,
+            port=port,
+            user=user,
+            password=password,
+            database=database,
+            min_size=0,
+            max_size=TENANT_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=TENANT_POOL_IDLE_SECONDS,
         )
+        _tenant_pools[tenant.tenant_code] = (params, pool)
+
+    # Credenciais do tenant mudaram: o pool antigo fecha quando as
+    # conexoes emprestadas voltarem
+    if entry is not None:
+        task = asyncio.create_task(entry[1].close())
+        _closing_pools.add(task)
+        task.add_done_callback(_closing_pools.discard)
+    return pool
+
+
+async def close_tenant_pools():
+    """Fecha os pools dos tenants (shutdown)"""
+    pools = [pool for _, pool in _tenant_pools.values()]
+    _tenant_pools.clear()
+    for pool in pools:
+        try:
+            await pool.close()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar pool de tenant: {e}")
+    if _closing_pools:
+        await asyncio.gather(*_closing_pools, return_exceptions=True)
+
+
+async def get_tenant_connection(tenant: Tenant) -> TenantConnection:
+    """Empresta uma conexao do pool do banco do tenant (devolvida em close())"""
+    conn = None
+    try:
+        pool = await _get_tenant_pool(tenant)
+        conn = TenantConnection(pool, await pool.acquire(timeout=TENANT_POOL_ACQUIRE_TIMEOUT))
         # Garante colunas de ownership + juridicas de customers (uma vez por tenant apos restart)
         tcode = getattr(tenant, "tenant_code", "")
         await ensure_ownership_columns(conn, tcode)
@@ -560,6 +646,8 @@ async def get_tenant_connection(tenant: Tenant) -> asyncpg.Connection:
         return conn
     except Exception as e:
         logger.error(f"Erro ao conectar ao banco do tenant {tenant.tenant_code}: {e}")
+        if conn is not None:
+            await conn.close()
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Erro ao conectar ao banco de dados"
@@ -8799,11 +8887,10 @@ async def upload_certificate(
         # Tenta validar o certificado com a senha
         try:
             from cryptography.hazmat.primitives.serialization import pkcs12
-            from cryptography.hazmat.backends import default_backend
             from cryptography import x509
 
             private_key, cert, chain = pkcs12.load_key_and_certificates(
-                cert_data, password.encode(), default_backend()
+                cert_data, password.encode()
             )
 
             # Extrai informacoes do certificado
@@ -9725,17 +9812,17 @@ async def enviar_carta_correcao(
                 }
 
             # Em producao, envia para SEFAZ
-            from app.services.nfe_service import SefazClient
+            from app.services.nfe_service import get_sefaz_client
             url = nfe_service.get_sefaz_url(fiscal['uf'], 'RecepcaoEvento', nfe['ambiente'])
             if not url:
                 raise HTTPException(status_code=500, detail="URL do servico nao encontrada")
 
-            client = SefazClient(
+            client = get_sefaz_client(
                 fiscal['certificate_file'],
                 nfe_service._decrypt_password(fiscal['certificate_password_encrypted'])
             )
 
-            result = client.enviar_evento(xml_assinado, url)
+            result = await client.enviar_evento(xml_assinado, url)
 
             if result.get('success'):
                 await conn.execute("""
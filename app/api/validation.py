@@ -6,17 +6,19 @@ Endpoints públicos para ativação e validação de licenças
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.orm import selectinload
 
 from app.database import get_db
-from app.models import License, LicenseValidation, LicenseStatus, Client
+from app.models import License, LicenseStatus, Client
 from app.schemas import (
     LicenseActivateRequest,
     LicenseValidateRequest,
     LicenseValidateResponse
 )
-from app.core import rsa_manager
+from app.core import rsa_manager, PydanticJSONResponse
+from app.services.license_service import get_license_snapshot, invalidate_license
+from app.services.validation_logger import log_validation, touch_heartbeat
 
 router = APIRouter(prefix="/v1", tags=["License Validation"])
 
@@ -48,18 +50,7 @@ async def activate_license(
     license = result.scalar_one_or_none()
 
     if not license:
-        # Registra tentativa falha
-        validation = LicenseValidation(
-            license_id=None,
-            ip_address=get_client_ip(request),
-            user_agent=request.headers.get("User-Agent", "")[:500],
-            hardware_id=request_data.hardware_id,
-            validation_type="activation",
-            success=False,
-            error_message="License not found"
-        )
-        # Não salva pois license_id é obrigatório
-
+        # Tentativa não é registrada: license_validations.license_id é obrigatório
         return LicenseValidateResponse(
             valid=False,
             status="error",
@@ -68,7 +59,7 @@ async def activate_license(
 
     # Verifica se já está ativada em outro hardware
     if license.hardware_id and license.hardware_id != request_data.hardware_id:
-        validation = LicenseValidation(
+        await log_validation(
             license_id=license.id,
             ip_address=get_client_ip(request),
             user_agent=request.headers.get("User-Agent", "")[:500],
@@ -77,8 +68,6 @@ async def activate_license(
             success=False,
             error_message="License already activated on another hardware"
         )
-        db.add(validation)
-        await db.commit()
 
         return LicenseValidateResponse(
             valid=False,
@@ -135,8 +124,10 @@ async def activate_license(
     }
     license.signature = rsa_manager.sign_license(license_data)
 
-    # Registra validação bem sucedida
-    validation = LicenseValidation(
+    await db.commit()
+
+    # Registra validação bem sucedida (gravada em lote)
+    await log_validation(
         license_id=license.id,
         ip_address=get_client_ip(request),
         user_agent=request.headers.get("User-Agent", "")[:500],
@@ -144,8 +135,6 @@ async def activate_license(
         validation_type="activation",
         success=True
     )
-    db.add(validation)
-    await db.commit()
 
     return LicenseValidateResponse(
         valid=True,
@@ -166,6 +155,11 @@ async def activate_license(
     )
 
 
+# Heartbeat: todos os valores da resposta são montados aqui mesmo, então o
+# model é construído sem passar pelo validador (só é serializado)
+_validate_response = LicenseValidateResponse.model_construct
+
+
 @router.post("/validate", response_model=LicenseValidateResponse)
 async def validate_license(
     request_data: LicenseValidateRequest,
@@ -176,16 +170,21 @@ async def validate_license(
     Valida licença (heartbeat periódico).
     Endpoint público (chamado pelo enterprise_system periodicamente)
     """
-    # Busca licença com eager loading do client
-    result = await db.execute(
-        select(License)
-        .options(selectinload(License.client))
-        .where(License.license_key == request_data.license_key)
-    )
-    license = result.scalar_one_or_none()
+    # Caminho mais quente da API: o model sai serializado direto pelo
+    # pydantic-core, sem passar de novo pelo response_model
+    return PydanticJSONResponse(await _validate_license(request_data, request, db))
+
+
+async def _validate_license(
+    request_data: LicenseValidateRequest,
+    request: Request,
+    db: AsyncSession
+) -> LicenseValidateResponse:
+    # Leitura pelo cache (TTL curto, invalidado nas escritas)
+    license = await get_license_snapshot(db, request_data.license_key)
 
     if not license:
-        return LicenseValidateResponse(
+        return _validate_response(
             valid=False,
             status="error",
             message="License not found"
@@ -193,7 +192,7 @@ async def validate_license(
 
     # Verifica hardware
     if license.hardware_id and license.hardware_id != request_data.hardware_id:
-        validation = LicenseValidation(
+        await log_validation(
             license_id=license.id,
             ip_address=get_client_ip(request),
             user_agent=request.headers.get("User-Agent", "")[:500],
@@ -202,10 +201,8 @@ async def validate_license(
             success=False,
             error_message="Hardware mismatch"
         )
-        db.add(validation)
-        await db.commit()
 
-        return LicenseValidateResponse(
+        return _validate_response(
             valid=False,
             status="error",
             message="Hardware ID mismatch. License may be pirated."
@@ -213,37 +210,40 @@ async def validate_license(
 
     # Verifica status
     if license.status == LicenseStatus.REVOKED.value:
-        return LicenseValidateResponse(
+        return _validate_response(
             valid=False,
             status="revoked",
             message="License has been revoked"
         )
 
     if license.status == LicenseStatus.SUSPENDED.value:
-        return LicenseValidateResponse(
+        return _validate_response(
             valid=False,
             status="suspended",
             message="License has been suspended. Contact support."
         )
 
     # Verifica expiração
-    if license.expires_at and datetime.utcnow() > license.expires_at:
-        license.status = LicenseStatus.EXPIRED.value
+    now = datetime.utcnow()
+    if license.expires_at and now > license.expires_at:
+        await db.execute(
+            update(License)
+            .where(License.id == license.id)
+            .values(status=LicenseStatus.EXPIRED.value)
+        )
         await db.commit()
+        invalidate_license(license.license_key)
 
-        return LicenseValidateResponse(
+        return _validate_response(
             valid=False,
             status="expired",
             message="License has expired",
             expires_at=license.expires_at
         )
 
-    # Atualiza último heartbeat
-    license.last_validated_at = datetime.utcnow()
-    license.last_heartbeat_at = datetime.utcnow()
-
-    # Registra validação
-    validation = LicenseValidation(
+    # Atualiza último heartbeat e registra validação (ambos gravados em lote)
+    touch_heartbeat(license.id, now)
+    await log_validation(
         license_id=license.id,
         ip_address=get_client_ip(request),
         user_agent=request.headers.get("User-Agent", "")[:500],
@@ -251,10 +251,8 @@ async def validate_license(
         validation_type="heartbeat",
         success=True
     )
-    db.add(validation)
-    await db.commit()
 
-    return LicenseValidateResponse(
+    return _validate_response(
         valid=True,
         status="active",
         message="License is valid",
@@ -262,7 +260,7 @@ async def validate_license(
         plan=license.plan,
         features=license.features or [],
         expires_at=license.expires_at,
-        days_until_expiry=license.days_until_expiry(),
+        days_until_expiry=license.days_until_expiry(now),
         limits={
             "max_users": license.max_users,
             "max_customers": license.max_customers,
@@ -8,8 +8,10 @@ from .security import (
     create_signed_license,
     verify_license,
     verify_password,
-    get_password_hash
+    get_password_hash,
+    password_needs_rehash
 )
+from .responses import MsgspecJSONResponse, PydanticJSONResponse, dump_model
 from .email import email_service, EmailService
 from .provisioning import provisioning_service, TenantProvisioningService, ProvisioningError
 
@@ -25,6 +27,10 @@ __all__ = [
     "verify_license",
     "verify_password",
     "get_password_hash",
+    "password_needs_rehash",
+    "MsgspecJSONResponse",
+    "PydanticJSONResponse",
+    "dump_model",
     "email_service",
     "EmailService",
     "provisioning_service",
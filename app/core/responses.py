@@ -0,0 +1,42 @@
+"""
+License Server - Responses
+Respostas JSON serializadas direto em C/Rust (msgspec e pydantic-core)
+"""
+from typing import Any
+
+import msgspec
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+_encoder = msgspec.json.Encoder()
+
+# Opções fixas de serialização: passadas prontas, sem montar kwargs a cada
+# chamada. Mesma saída do response_model do FastAPI (nulos incluídos).
+_DEFAULT_SER = {"by_alias": True}
+
+
+class MsgspecJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa com msgspec (structs, datetime e enums em C).
+    Devolvida diretamente pelo endpoint, dispensa a validação do response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return _encoder.encode(content)
+
+
+def dump_model(model: BaseModel) -> bytes:
+    """JSON do model direto pelo serializer do pydantic-core (sem o wrapper
+    Python de model_dump_json)"""
+    return model.__pydantic_serializer__.to_json(model, **_DEFAULT_SER)
+
+
+class PydanticJSONResponse(Response):
+    """
+    Resposta com um model Pydantic já pronto: serializa uma vez com
+    dump_model, sem a revalidação do response_model e sem dict intermediário.
+    """
+    media_type = "application/json"
+
+    def render(self, content: BaseModel) -> bytes:
+        return dump_model(content)
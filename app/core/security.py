@@ -15,13 +15,27 @@ from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
 from cryptography.exceptions import InvalidSignature
 from jose import jwt, JWTError
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 import bcrypt
 
 from .config import settings
 
 
+# Hasher argon2id para senhas de admin (hashes bcrypt legados continuam aceitos)
+password_hasher = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=4)
+
+# Prefixos de hash reconhecidos como validos
+PASSWORD_HASH_PREFIXES = ('$argon2id$', '$2b$', '$2a$')
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica password usando bcrypt"""
+    """Verifica password (argon2id, ou bcrypt para hashes legados)"""
+    if hashed_password.startswith('$argon2'):
+        try:
+            return password_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
     return bcrypt.checkpw(
         plain_password.encode('utf-8'),
         hashed_password.encode('utf-8')
@@ -29,11 +43,15 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    """Gera hash bcrypt do password"""
-    return bcrypt.hashpw(
-        password.encode('utf-8'),
-        bcrypt.gensalt()
-    ).decode('utf-8')
+    """Gera hash argon2id do password"""
+    return password_hasher.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True se o hash e bcrypt legado ou argon2 com parametros antigos"""
+    if not hashed_password.startswith('$argon2id$'):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
 
 
 class RSAKeyManager:
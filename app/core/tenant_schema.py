@@ -1656,6 +1656,8 @@ CREATE TABLE IF NOT EXISTS users (
 -- =====================================================
 -- ENTRADAS DO DIÁRIO (DIARY_ENTRIES)
 -- =====================================================
+-- fillfactor 85 nas tabelas com UPDATE frequente (updated_at, contadores):
+-- sobra espaco na pagina para HOT updates, sem reescrever os indices
 CREATE TABLE IF NOT EXISTS diary_entries (
     id VARCHAR(36) PRIMARY KEY,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -1693,7 +1695,7 @@ CREATE TABLE IF NOT EXISTS diary_entries (
     metadata JSONB,
     -- Soft delete
     deleted_at TIMESTAMP
-);
+) WITH (fillfactor = 85);
 
 -- =====================================================
 -- TAGS (TAGS)
@@ -1716,7 +1718,7 @@ CREATE TABLE IF NOT EXISTS tags (
     is_active BOOLEAN DEFAULT TRUE,
     -- Unicidade por usuário
     UNIQUE(user_id, slug)
-);
+) WITH (fillfactor = 85);
 
 -- =====================================================
 -- RELAÇÃO ENTRADA-TAG (ENTRY_TAGS)
@@ -1784,7 +1786,7 @@ CREATE TABLE IF NOT EXISTS writing_prompts (
     is_system BOOLEAN DEFAULT FALSE,
     -- Métricas
     times_used INTEGER DEFAULT 0
-);
+) WITH (fillfactor = 85);
 
 -- =====================================================
 -- HISTÓRICO DE HUMOR (MOOD_HISTORY)
@@ -1826,7 +1828,7 @@ CREATE TABLE IF NOT EXISTS user_streaks (
     total_days_active INTEGER DEFAULT 0,
     -- Conquistas
     achievements JSONB DEFAULT '[]'
-);
+) WITH (fillfactor = 85);
 
 -- =====================================================
 -- LOG DE ATIVIDADES (ACTIVITY_LOGS)
@@ -1899,14 +1901,13 @@ CREATE TABLE IF NOT EXISTS shared_entries (
 -- ÍNDICES PARA PERFORMANCE - DIARIO
 -- =====================================================
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
-CREATE INDEX IF NOT EXISTS idx_diary_entries_user ON diary_entries(user_id);
 CREATE INDEX IF NOT EXISTS idx_diary_entries_date ON diary_entries(entry_date DESC);
 CREATE INDEX IF NOT EXISTS idx_diary_entries_user_date ON diary_entries(user_id, entry_date DESC);
 CREATE INDEX IF NOT EXISTS idx_diary_entries_mood ON diary_entries(mood);
 CREATE INDEX IF NOT EXISTS idx_diary_entries_favorite ON diary_entries(user_id, is_favorite) WHERE is_favorite = TRUE;
 CREATE INDEX IF NOT EXISTS idx_diary_entries_deleted ON diary_entries(deleted_at) WHERE deleted_at IS NULL;
-CREATE INDEX IF NOT EXISTS idx_tags_user ON tags(user_id);
-CREATE INDEX IF NOT EXISTS idx_tags_slug ON tags(user_id, slug);
+-- tags(user_id) e tags(user_id, slug) ja sao atendidos pelo UNIQUE(user_id, slug);
+-- diary_entries(user_id) pelo prefixo de idx_diary_entries_user_date
 CREATE INDEX IF NOT EXISTS idx_entry_tags_entry ON entry_tags(entry_id);
 CREATE INDEX IF NOT EXISTS idx_entry_tags_tag ON entry_tags(tag_id);
 CREATE INDEX IF NOT EXISTS idx_mood_history_user ON mood_history(user_id);
@@ -1917,6 +1918,15 @@ CREATE INDEX IF NOT EXISTS idx_shared_entries_token ON shared_entries(share_toke
 CREATE INDEX IF NOT EXISTS idx_writing_prompts_user ON writing_prompts(user_id) WHERE user_id IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_writing_prompts_system ON writing_prompts(is_system) WHERE is_system = TRUE;
 
+-- Prompts do sistema sao unicos por texto. Remove duplicatas geradas por
+-- seeds antigos (UUID aleatorio a cada startup) antes de criar o indice.
+DELETE FROM writing_prompts a
+    USING writing_prompts b
+    WHERE a.is_system = TRUE AND b.is_system = TRUE
+      AND a.prompt_text = b.prompt_text
+      AND a.id > b.id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_writing_prompts_system_text ON writing_prompts(prompt_text) WHERE is_system = TRUE;
+
 -- =====================================================
 -- TRIGGERS PARA ATUALIZAÇÃO AUTOMÁTICA
 -- =====================================================
@@ -1983,17 +1993,18 @@ CREATE TRIGGER update_tag_usage_delete AFTER DELETE ON entry_tags
 -- =====================================================
 -- DADOS INICIAIS - PROMPTS DO SISTEMA
 -- =====================================================
+-- IDs fixos: o seed e idempotente (conflito por id ou por prompt_text)
 INSERT INTO writing_prompts (id, prompt_text, category, is_system, is_active) VALUES
-    (gen_random_uuid()::text, 'O que aconteceu de bom hoje?', 'gratidao', TRUE, TRUE),
-    (gen_random_uuid()::text, 'Pelo que você é grato hoje?', 'gratidao', TRUE, TRUE),
-    (gen_random_uuid()::text, 'Como você está se sentindo agora?', 'emocoes', TRUE, TRUE),
-    (gen_random_uuid()::text, 'Qual foi o momento mais marcante do seu dia?', 'reflexao', TRUE, TRUE),
-    (gen_random_uuid()::text, 'O que você aprendeu hoje?', 'aprendizado', TRUE, TRUE),
-    (gen_random_uuid()::text, 'Quais são seus objetivos para amanhã?', 'planejamento', TRUE, TRUE),
-    (gen_random_uuid()::text, 'Descreva um momento que te fez sorrir hoje.', 'positividade', TRUE, TRUE),
-    (gen_random_uuid()::text, 'O que você faria diferente hoje se pudesse?', 'reflexao', TRUE, TRUE),
-    (gen_random_uuid()::text, 'Qual desafio você enfrentou hoje e como lidou com ele?', 'desafios', TRUE, TRUE),
-    (gen_random_uuid()::text, 'Escreva uma carta para o seu eu do futuro.', 'criativo', TRUE, TRUE)
+    ('00000000-0000-0000-0000-000000000001', 'O que aconteceu de bom hoje?', 'gratidao', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000002', 'Pelo que você é grato hoje?', 'gratidao', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000003', 'Como você está se sentindo agora?', 'emocoes', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000004', 'Qual foi o momento mais marcante do seu dia?', 'reflexao', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000005', 'O que você aprendeu hoje?', 'aprendizado', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000006', 'Quais são seus objetivos para amanhã?', 'planejamento', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000007', 'Descreva um momento que te fez sorrir hoje.', 'positividade', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000008', 'O que você faria diferente hoje se pudesse?', 'reflexao', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000009', 'Qual desafio você enfrentou hoje e como lidou com ele?', 'desafios', TRUE, TRUE),
+    ('00000000-0000-0000-0000-000000000010', 'Escreva uma carta para o seu eu do futuro.', 'criativo', TRUE, TRUE)
 ON CONFLICT DO NOTHING;
 """
 
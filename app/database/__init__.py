@@ -1,3 +1,3 @@
-from .session import Base, get_db, init_db, AsyncSessionLocal, engine
+from .session import Base, get_db, init_db, AsyncSessionLocal, engine, uuid_pk, pg_enum, JSONType, utcnow, days_until
 
-__all__ = ["Base", "get_db", "init_db", "AsyncSessionLocal", "engine"]
+__all__ = ["Base", "get_db", "init_db", "AsyncSessionLocal", "engine", "uuid_pk", "pg_enum", "JSONType", "utcnow", "days_until"]
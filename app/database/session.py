@@ -1,10 +1,15 @@
 """
 License Server - Database Session
 """
+import asyncio
 import logging
+import uuid
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
-from sqlalchemy import text
+from sqlalchemy.orm import DeclarativeBase, mapped_column
+from sqlalchemy import JSON, DateTime, Enum, Integer, String, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.dialects.postgresql import JSONB
 
 from app.core.config import settings
 
@@ -25,8 +30,72 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False
 )
 
-# Base para models
-Base = declarative_base()
+# Base para models (declaração tipada: Mapped[...] + mapped_column)
+class Base(DeclarativeBase):
+    # Valores gerados pelo banco (id, updated_at) voltam no RETURNING do próprio
+    # INSERT/UPDATE, sem SELECT extra nem lazy load depois do flush
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class utcnow(FunctionElement):
+    """Horário UTC calculado pelo banco (as colunas DateTime são UTC sem fuso)"""
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow, "postgresql")
+def _pg_utcnow(element, compiler, **kw):
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+@compiles(utcnow)
+def _default_utcnow(element, compiler, **kw):
+    # SQLite: CURRENT_TIMESTAMP já é UTC
+    return "CURRENT_TIMESTAMP"
+
+
+class days_until(FunctionElement):
+    """Dias inteiros de agora (UTC) até a data, nunca negativo.
+    Mesma regra de max(0, (data - utcnow).days) no Python."""
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(days_until, "postgresql")
+def _pg_days_until(element, compiler, **kw):
+    target = compiler.process(element.clauses, **kw)
+    return (
+        f"GREATEST(0, FLOOR(EXTRACT(EPOCH FROM ({target} - "
+        f"TIMEZONE('utc', CURRENT_TIMESTAMP))) / 86400))::integer"
+    )
+
+
+@compiles(days_until)
+def _default_days_until(element, compiler, **kw):
+    target = compiler.process(element.clauses, **kw)
+    return f"MAX(0, CAST(julianday({target}) - julianday('now') AS INTEGER))"
+
+# JSONB no Postgres (binário, indexável com GIN); JSON comum no SQLite
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+def uuid_pk():
+    """PK String(36). No Postgres o UUID é gerado pelo banco (gen_random_uuid);
+    no SQLite de desenvolvimento continua vindo do Python."""
+    if engine.dialect.name == "postgresql":
+        return mapped_column(String(36), primary_key=True, server_default=text("gen_random_uuid()::text"))
+    return mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+
+
+def pg_enum(enum_cls, name: str) -> Enum:
+    """Tipo ENUM nativo no Postgres (4 bytes por valor); VARCHAR no SQLite.
+    Grava o .value dos membros, como as antigas colunas String."""
+    return Enum(
+        enum_cls,
+        name=name,
+        native_enum=engine.dialect.name == "postgresql",
+        values_callable=lambda members: [m.value for m in members],
+    )
 
 
 async def get_db() -> AsyncSession:
@@ -45,12 +114,12 @@ async def get_db() -> AsyncSession:
 async def verify_admin_integrity():
     """
     Verifica integridade do admin na inicialização.
-    Se o hash estiver corrompido (não começa com $2b$), restaura para senha padrão.
+    Se o hash estiver corrompido (não é argon2id nem bcrypt), restaura para senha padrão.
 
     IMPORTANTE: Isso garante que o admin sempre tenha acesso ao sistema,
     mesmo se o hash for corrompido por comandos SSH mal-formados.
     """
-    import bcrypt
+    from app.core.security import get_password_hash, PASSWORD_HASH_PREFIXES
 
     async with AsyncSessionLocal() as session:
         try:
@@ -66,14 +135,14 @@ async def verify_admin_integrity():
 
             admin_id, email, hashed_password = admin
 
-            # Verifica se o hash está válido (deve começar com $2b$ ou $2a$)
-            if not hashed_password or not hashed_password.startswith(('$2b$', '$2a$')):
+            # Verifica se o hash está válido ($argon2id$, ou bcrypt legado $2b$/$2a$)
+            if not hashed_password or not hashed_password.startswith(PASSWORD_HASH_PREFIXES):
                 logger.error(f"ALERTA: Hash do admin {email} está CORROMPIDO!")
                 logger.error(f"Hash atual: {hashed_password[:20] if hashed_password else 'NULL'}...")
 
                 # Gera novo hash com senha padrão
                 default_password = settings.ADMIN_PASSWORD or "admin123"
-                new_hash = bcrypt.hashpw(default_password.encode(), bcrypt.gensalt(12)).decode()
+                new_hash = await asyncio.to_thread(get_password_hash, default_password)
 
                 # Atualiza no banco
                 await session.execute(
@@ -85,7 +154,7 @@ async def verify_admin_integrity():
                 logger.info(f"Hash do admin {email} foi RESTAURADO!")
                 logger.info(f"Nova senha: {default_password}")
             else:
-                logger.info(f"Admin {email} - hash válido (bcrypt)")
+                logger.info(f"Admin {email} - hash válido")
 
         except Exception as e:
             logger.error(f"Erro ao verificar integridade do admin: {e}")
@@ -3,13 +3,16 @@ License Server - Main Application
 Sistema de licenciamento profissional com RSA
 """
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import os
 import asyncio
+import functools
+from pathlib import Path
 import threading
 
 from app.core import settings
@@ -43,6 +46,8 @@ async def lifespan(app: FastAPI):
     print(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     print(f"Environment: {settings.ENVIRONMENT}")
 
+    print(f"Uploads directory: {_uploads_dir()}")
+
     # Inicializa banco de dados
     await init_db()
     print("Database initialized")
@@ -65,10 +70,20 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"[LICENSE-EXPIRATION] Aviso: Nao foi possivel iniciar: {e}")
 
+    # Gravacao em lote do historico de validacoes
+    from app.services.validation_logger import run_validation_logger
+    validation_logger_task = asyncio.create_task(run_validation_logger())
+    print("[VALIDATION-LOGGER] Gravacao em lote iniciada")
+
     yield
 
     # Shutdown
     print("Shutting down...")
+    validation_logger_task.cancel()
+    try:
+        await validation_logger_task
+    except asyncio.CancelledError:
+        print("[VALIDATION-LOGGER] Pendentes gravados, task encerrado")
     if expiration_task:
         expiration_task.cancel()
         try:
@@ -82,21 +97,78 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             print("[BACKUP-SCHEDULER] Scheduler encerrado")
 
+    # Pools asyncpg dos bancos dos tenants
+    from app.api.tenant_gateway import close_tenant_pools
+    await close_tenant_pools()
+
+    # Clientes HTTP (mTLS) da SEFAZ
+    try:
+        from app.services.nfe_service import close_sefaz_clients
+    except ImportError:
+        pass
+    else:
+        await close_sefaz_clients()
+
 
 # Middleware de headers de seguranca
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Adiciona headers de seguranca em todas as respostas"""
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        # Headers de seguranca (nao quebra CORS)
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+# Headers pre-calculados no import para nao remontar a cada request
+_SECURITY_HEADERS = (
+    ("X-Content-Type-Options", "nosniff"),
+    ("X-Frame-Options", "DENY"),
+    ("X-XSS-Protection", "1; mode=block"),
+    ("Referrer-Policy", "strict-origin-when-cross-origin"),
+)
+_NO_CACHE_HEADERS = (
+    ("Cache-Control", "no-store, no-cache, must-revalidate"),
+    ("Pragma", "no-cache"),
+)
+
+
+class SecurityHeadersMiddleware:
+    """
+    Adiciona headers de seguranca em todas as respostas.
+    Middleware ASGI puro (sem BaseHTTPMiddleware): os headers sao escritos
+    direto no evento http.response.start, sem a fila extra por request.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
         # Cache control para endpoints de autenticacao
-        if "/auth" in request.url.path or "/login" in request.url.path:
-            response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate"
-            response.headers["Pragma"] = "no-cache"
+        is_auth = "/auth" in path or "/login" in path
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                # Headers de seguranca (nao quebra CORS)
+                for name, value in _SECURITY_HEADERS:
+                    headers[name] = value
+                if is_auth:
+                    for name, value in _NO_CACHE_HEADERS:
+                        headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles com cache agressivo para logos.
+    Logos sao gravados com nome unico (nunca sobrescritos), entao o navegador
+    pode guardar por 1 ano; demais arquivos sempre revalidam.
+    """
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        relative = os.path.relpath(full_path, self.directory)
+        if relative.startswith("logos" + os.sep):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
         return response
 
 
@@ -106,6 +178,10 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Professional License Management System with RSA signatures",
     lifespan=lifespan,
+    # Retorno em dict/lista ainda passa por jsonable_encoder (Python) antes
+    # do orjson; o ganho de serializar os datetime dos to_dict() em C so
+    # vale nas rotas que devolvem ORJSONResponse(...) direto (listagens)
+    default_response_class=ORJSONResponse,
     docs_url="/docs" if settings.DEBUG else None,
     redoc_url="/redoc" if settings.DEBUG else None
 )
@@ -146,13 +222,23 @@ app.include_router(diario_gateway_router, prefix="/api")
 if os.path.exists("/app/uploads"):
     uploads_dir = "/app/uploads"
 else:
-    # Desenvolvimento local - cria pasta uploads na raiz do projeto
+    # Desenvolvimento local - pasta uploads na raiz do projeto
     uploads_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
 
-os.makedirs(uploads_dir, exist_ok=True)
-os.makedirs(os.path.join(uploads_dir, "logos"), exist_ok=True)
-print(f"Uploads directory: {uploads_dir}")
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+
+@functools.lru_cache(maxsize=1)
+def _uploads_dir() -> str:
+    """Garante a pasta de uploads (e logos/) uma unica vez por processo"""
+    Path(uploads_dir, "logos").mkdir(parents=True, exist_ok=True)
+    return uploads_dir
+
+
+# Em producao o ideal e o proxy (nginx/Caddy) servir /uploads direto do disco
+app.mount(
+    "/uploads",
+    CachedStaticFiles(directory=uploads_dir, check_dir=False, follow_symlink=False),
+    name="uploads"
+)
 
 
 @app.get("/")
@@ -2,29 +2,31 @@
 License Server - Admin User Model
 Usuários administradores do sistema de licenças
 """
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime
+from typing import Optional
+from sqlalchemy import String, Boolean, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
 
-from app.database import Base
+from app.database import Base, uuid_pk, utcnow
 
 
 class AdminUser(Base):
     """Modelo de usuário admin"""
     __tablename__ = "admin_users"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = uuid_pk()
 
-    email = Column(String(255), unique=True, nullable=False, index=True)
-    hashed_password = Column(String(255), nullable=False)
-    full_name = Column(String(255))
+    email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
+    # Adiado: só o login lê o hash (undefer na consulta)
+    hashed_password: Mapped[str] = mapped_column(String(255), nullable=False, deferred=True)
+    full_name: Mapped[Optional[str]] = mapped_column(String(255))
 
-    is_active = Column(Boolean, default=True)
-    is_superadmin = Column(Boolean, default=False)
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    is_superadmin: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
 
-    last_login_at = Column(DateTime)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_login_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     def to_dict(self):
         return {
@@ -33,6 +35,6 @@ class AdminUser(Base):
             "full_name": self.full_name,
             "is_active": self.is_active,
             "is_superadmin": self.is_superadmin,
-            "last_login_at": self.last_login_at.isoformat() if self.last_login_at else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "last_login_at": self.last_login_at,
+            "created_at": self.created_at,
         }
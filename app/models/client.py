@@ -2,45 +2,48 @@
 License Server - Client Model
 Representa empresas/clientes que compram licenças
 """
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Text
-from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import relationship
+from typing import TYPE_CHECKING, List, Optional
+from sqlalchemy import String, Boolean, DateTime, Text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import Base, uuid_pk, JSONType, utcnow
+
+if TYPE_CHECKING:
+    from app.models.license import License
 
 
 class Client(Base):
     """Modelo de Cliente (empresa que compra licença)"""
     __tablename__ = "clients"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = uuid_pk()
 
     # Dados da empresa
-    name = Column(String(255), nullable=False, index=True)
-    document = Column(String(20), unique=True, index=True)
-    email = Column(String(255), nullable=False, unique=True, index=True)
-    phone = Column(String(20))
-    contact_name = Column(String(255))
+    name: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    document: Mapped[Optional[str]] = mapped_column(String(20), unique=True, index=True)
+    email: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
+    phone: Mapped[Optional[str]] = mapped_column(String(20))
+    contact_name: Mapped[Optional[str]] = mapped_column(String(255))
 
     # Endereço
-    address = Column(Text)
-    city = Column(String(100))
-    state = Column(String(2))
-    country = Column(String(50), default="Brasil")
+    address: Mapped[Optional[str]] = mapped_column(Text)
+    city: Mapped[Optional[str]] = mapped_column(String(100))
+    state: Mapped[Optional[str]] = mapped_column(String(2))
+    country: Mapped[Optional[str]] = mapped_column(String(50), default="Brasil")
 
     # Controle
-    is_active = Column(Boolean, default=True)
-    notes = Column(Text)
-    metadata_ = Column("metadata", JSON, default=dict)
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONType, default=dict)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     # Relacionamentos
-    licenses = relationship("License", back_populates="client", lazy="selectin")
+    # Carregamento sob demanda: quem precisar das licenças usa selectinload()
+    licenses: Mapped[List["License"]] = relationship("License", back_populates="client", lazy="raise_on_sql")
 
     def to_dict(self):
         return {
@@ -56,7 +59,7 @@ class Client(Base):
             "country": self.country,
             "is_active": self.is_active,
             "notes": self.notes,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "licenses_count": len(self.licenses) if self.licenses else 0
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "licenses_count": self.licenses_count or 0
         }
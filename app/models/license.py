@@ -2,14 +2,16 @@
 License Server - License Model
 Modelo principal de licenças com suporte a planos e features
 """
-import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, ForeignKey, Enum
-from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import relationship
+from typing import List, Optional
+from sqlalchemy import String, Boolean, DateTime, Text, Integer, ForeignKey, Index, and_, select, func, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, column_property
 import enum
 
-from app.database import Base
+from app.database import Base, uuid_pk, pg_enum, JSONType, utcnow, days_until
+from app.models.client import Client
+
+_utcnow = datetime.utcnow
 
 
 class LicensePlan(str, enum.Enum):
@@ -20,7 +22,7 @@ class LicensePlan(str, enum.Enum):
     UNLIMITED = "unlimited"
 
 
-class LicenseStatus(str, enum.Enum):
+class LicenseStatus(enum.StrEnum):
     """Status da licença"""
     PENDING = "pending"
     ACTIVE = "active"
@@ -29,74 +31,93 @@ class LicenseStatus(str, enum.Enum):
     REVOKED = "revoked"
 
 
+# Valor pré-resolvido para o caminho quente (validate/heartbeat/to_dict)
+_ACTIVE_VALUE = LicenseStatus.ACTIVE.value
+
+
 class License(Base):
     """Modelo de Licença"""
     __tablename__ = "licenses"
-
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    __table_args__ = (
+        # Validação filtra status ACTIVE + expires_at; painel filtra por cliente.
+        # status é o prefixo do primeiro, que atende também filtros só por status
+        Index('ix_licenses_status_expires', 'status', 'expires_at'),
+        Index('ix_licenses_client_status', 'client_id', 'status'),
+        # Parcial: só licenças ativas (expiração automática, dashboard)
+        Index('ix_licenses_active_expires', 'expires_at', postgresql_where=text("status = 'active'")),
+        # features @> '["premium_support"]' vira busca no índice
+        Index('ix_licenses_features_gin', 'features', postgresql_using='gin'),
+    )
+
+    id: Mapped[str] = uuid_pk()
 
     # Chave de licença (XXXX-XXXX-XXXX-XXXX)
-    license_key = Column(String(19), unique=True, nullable=False, index=True)
+    license_key: Mapped[str] = mapped_column(String(19), unique=True, nullable=False, index=True)
 
     # Cliente
-    client_id = Column(String(36), ForeignKey("clients.id"), nullable=False)
-    client = relationship("Client", back_populates="licenses")
+    client_id: Mapped[str] = mapped_column(String(36), ForeignKey("clients.id"), nullable=False)
+    client: Mapped["Client"] = relationship("Client", back_populates="licenses")
 
     # Hardware binding
-    hardware_id = Column(String(64), index=True)
-    hardware_info = Column(JSON, default=dict)
+    hardware_id: Mapped[Optional[str]] = mapped_column(String(64), index=True)
+    hardware_info: Mapped[Optional[dict]] = mapped_column(JSONType, default=dict)
 
     # Plano e features
-    plan = Column(String(20), default=LicensePlan.STARTER.value)
-    features = Column(JSON, default=list)
+    plan: Mapped[Optional[str]] = mapped_column(String(20), default=LicensePlan.STARTER.value)
+    features: Mapped[Optional[list]] = mapped_column(JSONType, default=list)
 
     # Limites
-    max_users = Column(Integer, default=5)
-    max_customers = Column(Integer, default=100)
-    max_products = Column(Integer, default=500)
-    max_monthly_transactions = Column(Integer, default=1000)
+    max_users: Mapped[Optional[int]] = mapped_column(Integer, default=5)
+    max_customers: Mapped[Optional[int]] = mapped_column(Integer, default=100)
+    max_products: Mapped[Optional[int]] = mapped_column(Integer, default=500)
+    max_monthly_transactions: Mapped[Optional[int]] = mapped_column(Integer, default=1000)
 
     # Datas
-    issued_at = Column(DateTime, default=datetime.utcnow)
-    activated_at = Column(DateTime)
-    expires_at = Column(DateTime, nullable=False)
-    last_validated_at = Column(DateTime)
-    last_heartbeat_at = Column(DateTime)
+    issued_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    activated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_validated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
     # Status
-    status = Column(String(20), default=LicenseStatus.PENDING.value, index=True)
-    is_trial = Column(Boolean, default=False)
+    status: Mapped[Optional[LicenseStatus]] = mapped_column(pg_enum(LicenseStatus, "license_status"), default=LicenseStatus.PENDING.value)
+    is_trial: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
 
     # Assinatura RSA
-    signature = Column(Text)
+    signature: Mapped[Optional[str]] = mapped_column(Text)
 
     # Metadados
-    notes = Column(Text)
-    metadata_ = Column("metadata", JSON, default=dict)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONType, default=dict)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     # Histórico de validações
-    validations = relationship("LicenseValidation", back_populates="license", lazy="selectin")
+    validations: Mapped[List["LicenseValidation"]] = relationship("LicenseValidation", back_populates="license", lazy="raise_on_sql")
+
+    def _compute_validity(self, now: datetime = None) -> tuple:
+        """Retorna (válida, dias até expirar) com um único instante de referência"""
+        now = now or _utcnow()
+        expires_at = self.expires_at
+        if not expires_at:
+            return self.status == _ACTIVE_VALUE, 999
+        return (
+            self.status == _ACTIVE_VALUE and now <= expires_at,
+            max(0, (expires_at - now).days),
+        )
 
     def is_valid(self) -> bool:
         """Verifica se licença está válida"""
-        if self.status != LicenseStatus.ACTIVE.value:
-            return False
-        if self.expires_at and datetime.utcnow() > self.expires_at:
-            return False
-        return True
+        return self._compute_validity()[0]
 
     def days_until_expiry(self) -> int:
         """Dias até expirar"""
-        if not self.expires_at:
-            return 999
-        delta = self.expires_at - datetime.utcnow()
-        return max(0, delta.days)
+        return self._compute_validity()[1]
 
     def to_dict(self, include_signature: bool = False):
+        is_valid, days_until_expiry = self._compute_validity()
         data = {
             "id": self.id,
             "license_key": self.license_key,
@@ -109,15 +130,15 @@ class License(Base):
             "max_customers": self.max_customers,
             "max_products": self.max_products,
             "max_monthly_transactions": self.max_monthly_transactions,
-            "issued_at": self.issued_at.isoformat() if self.issued_at else None,
-            "activated_at": self.activated_at.isoformat() if self.activated_at else None,
-            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
-            "last_validated_at": self.last_validated_at.isoformat() if self.last_validated_at else None,
+            "issued_at": self.issued_at,
+            "activated_at": self.activated_at,
+            "expires_at": self.expires_at,
+            "last_validated_at": self.last_validated_at,
             "status": self.status,
             "is_trial": self.is_trial,
-            "is_valid": self.is_valid(),
-            "days_until_expiry": self.days_until_expiry(),
-            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "is_valid": is_valid,
+            "days_until_expiry": days_until_expiry,
+            "created_at": self.created_at,
         }
         if include_signature:
             data["signature"] = self.signature
@@ -147,24 +168,29 @@ class License(Base):
 class LicenseValidation(Base):
     """Histórico de validações de licença"""
     __tablename__ = "license_validations"
+    __table_args__ = (
+        # Tabela só de inserção, em ordem de tempo: BRIN fica minúsculo.
+        # postgresql_using é ignorado nos outros dialetos (SQLite em dev).
+        Index('ix_validations_created_brin', 'created_at', postgresql_using='brin'),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = uuid_pk()
 
-    license_id = Column(String(36), ForeignKey("licenses.id"), nullable=False)
-    license = relationship("License", back_populates="validations")
+    license_id: Mapped[str] = mapped_column(String(36), ForeignKey("licenses.id"), nullable=False)
+    license: Mapped["License"] = relationship("License", back_populates="validations")
 
     # Info da validação
-    ip_address = Column(String(45))
-    user_agent = Column(String(500))
-    hardware_id = Column(String(64))
-    validation_type = Column(String(20))  # activation, heartbeat, check
+    ip_address: Mapped[Optional[str]] = mapped_column(String(45))
+    user_agent: Mapped[Optional[str]] = mapped_column(String(500))
+    hardware_id: Mapped[Optional[str]] = mapped_column(String(64))
+    validation_type: Mapped[Optional[str]] = mapped_column(String(20))  # activation, heartbeat, check
 
     # Resultado
-    success = Column(Boolean, default=True)
-    error_message = Column(Text)
+    success: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    error_message: Mapped[Optional[str]] = mapped_column(Text)
 
     # Timestamp
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
 
     def to_dict(self):
         return {
@@ -174,5 +200,29 @@ class LicenseValidation(Base):
             "validation_type": self.validation_type,
             "success": self.success,
             "error_message": self.error_message,
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "created_at": self.created_at
         }
+
+
+# Quantidade de licenças do cliente, calculada no banco. Fica aqui porque
+# depende de License; é adiada e só entra no SELECT com undefer().
+Client.licenses_count = column_property(
+    select(func.count(License.id))
+    .where(License.client_id == Client.id)
+    .correlate_except(License)
+    .scalar_subquery(),
+    deferred=True,
+)
+
+
+# Validade calculada no banco, para listagens: uma expressão no SELECT em vez
+# de um utcnow() + comparação por linha no Python. Adiadas: só entram na
+# consulta com undefer(). As regras são as de License._compute_validity.
+License.sql_is_valid = column_property(
+    and_(License.status == LicenseStatus.ACTIVE, License.expires_at >= utcnow()),
+    deferred=True,
+)
+License.sql_days_until_expiry = column_property(
+    days_until(License.expires_at),
+    deferred=True,
+)
@@ -2,15 +2,17 @@
 License Server - Subscription Models
 Modelos para planos de assinatura e transações de pagamento
 """
-import uuid
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, Float, ForeignKey
-from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import relationship
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import String, Boolean, DateTime, Text, Integer, Numeric, ForeignKey, Index, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from decimal import Decimal
 
-from app.database import Base
+from app.database import Base, uuid_pk, JSONType, utcnow
+
+if TYPE_CHECKING:
+    from app.models.tenant import Tenant
 
 
 class PaymentStatus(str, Enum):
@@ -35,6 +37,9 @@ class PaymentMethod(str, Enum):
     ACCOUNT_MONEY = "account_money"  # Saldo Mercado Pago
 
 
+_PAYMENT_PENDING = PaymentStatus.PENDING.value
+
+
 class SubscriptionPlan(Base):
     """
     Modelo de Plano de Assinatura
@@ -42,48 +47,50 @@ class SubscriptionPlan(Base):
     """
     __tablename__ = "subscription_plans"
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = uuid_pk()
 
     # Identificador único do plano (usado em URLs e referências)
-    code = Column(String(50), unique=True, nullable=False, index=True)
+    code: Mapped[str] = mapped_column(String(50), unique=True, nullable=False, index=True)
 
     # Código do produto (ENTERPRISE, DIARIO, etc) - permite planos separados por sistema
-    product_code = Column(String(20), default="ENTERPRISE", nullable=False, index=True)
+    product_code: Mapped[str] = mapped_column(String(20), default="ENTERPRISE", nullable=False, index=True)
 
     # Informações do plano
-    name = Column(String(100), nullable=False)  # Ex: "Plano 30 Dias"
-    description = Column(Text)  # Descrição detalhada
+    name: Mapped[str] = mapped_column(String(100), nullable=False)  # Ex: "Plano 30 Dias"
+    description: Mapped[Optional[str]] = mapped_column(Text)  # Descrição detalhada
 
     # Período e preço
-    days = Column(Integer, nullable=False)  # Quantidade de dias
-    price = Column(Float, nullable=False)   # Preço em reais (R$)
+    days: Mapped[int] = mapped_column(Integer, nullable=False)  # Quantidade de dias
+    price: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)   # Preço em reais (R$)
 
     # Desconto (para mostrar economia)
-    original_price = Column(Float)  # Preço sem desconto (para mostrar economia)
-    discount_percent = Column(Float, default=0)  # Percentual de desconto
+    original_price: Mapped[Optional[Decimal]] = mapped_column(Numeric(12, 2))  # Preço sem desconto (para mostrar economia)
+    discount_percent: Mapped[Optional[Decimal]] = mapped_column(Numeric(5, 2), default=Decimal("0"))  # Percentual de desconto
 
     # Controle
-    is_active = Column(Boolean, default=True)
-    is_featured = Column(Boolean, default=False)  # Plano em destaque
-    sort_order = Column(Integer, default=0)  # Ordem de exibição
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    is_featured: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)  # Plano em destaque
+    sort_order: Mapped[Optional[int]] = mapped_column(Integer, default=0)  # Ordem de exibição
 
     # Metadados
-    metadata_ = Column("metadata", JSON, default=dict)
+    metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONType, default=dict)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     def to_dict(self):
+        # Valores em reais saem como número, como em PlanResponse e
+        # PaymentHistoryResponse (app/api/payments.py); o banco guarda NUMERIC
         return {
             "id": self.id,
             "code": self.code,
             "name": self.name,
             "description": self.description,
             "days": self.days,
-            "price": self.price,
-            "original_price": self.original_price,
-            "discount_percent": self.discount_percent,
+            "price": float(self.price) if self.price is not None else None,
+            "original_price": float(self.original_price) if self.original_price is not None else None,
+            "discount_percent": float(self.discount_percent) if self.discount_percent is not None else None,
             "is_active": self.is_active,
             "is_featured": self.is_featured,
             "sort_order": self.sort_order
@@ -96,52 +103,56 @@ class PaymentTransaction(Base):
     Registra todas as transações de pagamento realizadas
     """
     __tablename__ = "payment_transactions"
+    __table_args__ = (
+        # Parcial: pagamentos aguardando confirmação
+        Index('ix_payments_pending', 'created_at', postgresql_where=text("status = 'pending'")),
+    )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = uuid_pk()
 
     # Referência ao tenant que está pagando
-    tenant_id = Column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
-    tenant = relationship("Tenant", backref="payment_transactions")
+    tenant_id: Mapped[str] = mapped_column(String(36), ForeignKey("tenants.id"), nullable=False, index=True)
+    tenant: Mapped["Tenant"] = relationship("Tenant", backref="payment_transactions")
 
     # Referência ao plano comprado
-    plan_id = Column(String(36), ForeignKey("subscription_plans.id"), nullable=False)
-    plan = relationship("SubscriptionPlan")
+    plan_id: Mapped[str] = mapped_column(String(36), ForeignKey("subscription_plans.id"), nullable=False)
+    plan: Mapped["SubscriptionPlan"] = relationship("SubscriptionPlan")
 
     # Dados do pagamento
-    amount = Column(Float, nullable=False)  # Valor pago
-    days_purchased = Column(Integer, nullable=False)  # Dias comprados
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)  # Valor pago (Decimal, sem erro de float)
+    days_purchased: Mapped[int] = mapped_column(Integer, nullable=False)  # Dias comprados
 
     # Status
-    status = Column(String(30), default=PaymentStatus.PENDING.value, index=True)
-    payment_method = Column(String(30))  # pix, credit_card, boleto, etc
+    status: Mapped[Optional[str]] = mapped_column(String(30), default=_PAYMENT_PENDING, index=True)
+    payment_method: Mapped[Optional[str]] = mapped_column(String(30))  # pix, credit_card, boleto, etc
 
     # Dados do Mercado Pago
-    mp_payment_id = Column(String(50), unique=True, index=True)  # ID do pagamento no MP
-    mp_preference_id = Column(String(100))  # ID da preferência no MP
-    mp_external_reference = Column(String(100), index=True)  # Referência externa (nosso ID)
-    mp_status = Column(String(30))  # Status retornado pelo MP
-    mp_status_detail = Column(String(100))  # Detalhe do status
+    mp_payment_id: Mapped[Optional[str]] = mapped_column(String(50), unique=True, index=True)  # ID do pagamento no MP
+    mp_preference_id: Mapped[Optional[str]] = mapped_column(String(100))  # ID da preferência no MP
+    mp_external_reference: Mapped[Optional[str]] = mapped_column(String(100), index=True)  # Referência externa (nosso ID)
+    mp_status: Mapped[Optional[str]] = mapped_column(String(30))  # Status retornado pelo MP
+    mp_status_detail: Mapped[Optional[str]] = mapped_column(String(100))  # Detalhe do status
 
     # Dados do pagador (do MP)
-    payer_email = Column(String(255))
-    payer_id = Column(String(50))
+    payer_email: Mapped[Optional[str]] = mapped_column(String(255))
+    payer_id: Mapped[Optional[str]] = mapped_column(String(50))
 
     # Datas importantes
-    expires_at = Column(DateTime)  # Data de expiração do pagamento (PIX/Boleto)
-    paid_at = Column(DateTime)  # Data que foi pago
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Data de expiração do pagamento (PIX/Boleto)
+    paid_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Data que foi pago
 
     # Período adicionado ao tenant
-    period_start = Column(DateTime)  # Início do período (data anterior + 1 dia ou hoje)
-    period_end = Column(DateTime)  # Fim do período (start + days)
+    period_start: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Início do período (data anterior + 1 dia ou hoje)
+    period_end: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Fim do período (start + days)
 
     # Informações extras
-    notes = Column(Text)
-    error_message = Column(Text)  # Mensagem de erro se houver
-    webhook_data = Column(JSON)  # Dados brutos recebidos do webhook
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    error_message: Mapped[Optional[str]] = mapped_column(Text)  # Mensagem de erro se houver
+    webhook_data: Mapped[Optional[dict]] = mapped_column(JSONType, deferred=True)  # Dados brutos recebidos do webhook (só gravado)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     def to_dict(self):
         return {
@@ -149,15 +160,15 @@ class PaymentTransaction(Base):
             "tenant_id": self.tenant_id,
             "plan_id": self.plan_id,
             "plan_name": self.plan.name if self.plan else None,
-            "amount": self.amount,
+            "amount": float(self.amount) if self.amount is not None else None,
             "days_purchased": self.days_purchased,
             "status": self.status,
             "payment_method": self.payment_method,
             "mp_payment_id": self.mp_payment_id,
             "mp_status": self.mp_status,
             "payer_email": self.payer_email,
-            "paid_at": self.paid_at.isoformat() if self.paid_at else None,
-            "period_start": self.period_start.isoformat() if self.period_start else None,
-            "period_end": self.period_end.isoformat() if self.period_end else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None
+            "paid_at": self.paid_at,
+            "period_start": self.period_start,
+            "period_end": self.period_end,
+            "created_at": self.created_at
         }
@@ -3,18 +3,27 @@ License Server - Tenant Model
 Representa um tenant (cliente) no sistema multi-tenant
 Gerencia informações de banco de dados e provisionamento
 """
-import uuid
+import re
 import secrets
 from datetime import datetime
-from enum import Enum
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, Enum as SQLEnum, ForeignKey, UniqueConstraint, Index
-from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import relationship
+from enum import StrEnum
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import String, Boolean, DateTime, Text, Integer, ForeignKey, UniqueConstraint, Index, and_, or_, text
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from app.database import Base
+from app.database import Base, uuid_pk, pg_enum, JSONType, utcnow
 
+if TYPE_CHECKING:
+    from app.models.client import Client
 
-class TenantStatus(str, Enum):
+# Remove tudo que não for dígito (pontuação de CPF/CNPJ) em uma passada
+_NON_DIGITS = re.compile(r'\D+')
+
+
+# StrEnum: a coluna volta como membro do enum, e f"{tenant.status}" precisa
+# renderizar "error", não "TenantStatus.ERROR"
+class TenantStatus(StrEnum):
     """Status do tenant"""
     PENDING = "pending"           # Aguardando provisionamento
     PROVISIONING = "provisioning" # Em processo de criação
@@ -39,91 +48,100 @@ class Tenant(Base):
         UniqueConstraint('email', 'product_code', name='uq_tenants_email_product'),
         UniqueConstraint('database_name', 'product_code', name='uq_tenants_database_name_product'),
         UniqueConstraint('subdomain', 'product_code', name='uq_tenants_subdomain_product'),
-        # Indexes simples para performance de busca
-        Index('ix_tenants_document', 'document'),
-        Index('ix_tenants_email', 'email'),
-        Index('ix_tenants_tenant_code', 'tenant_code'),
+        # Buscas por document/email/tenant_code usam os índices das uniques
+        # acima (a coluna é o prefixo); índices simples nelas seriam duplicados
+        # Parcial: tenants ativos por produto
+        Index('ix_tenants_active', 'product_code', postgresql_where=text("status = 'active'")),
     )
 
-    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = uuid_pk()
 
     # Identificador único do tenant (CPF/CNPJ, único por produto)
-    tenant_code = Column(String(100), nullable=False)
+    tenant_code: Mapped[str] = mapped_column(String(100), nullable=False)
 
     # Dados do responsável/empresa
-    name = Column(String(255), nullable=False)  # Nome completo ou razão social
-    trade_name = Column(String(255))  # Nome fantasia
-    document = Column(String(20), nullable=False)  # CPF ou CNPJ
-    email = Column(String(255), nullable=False)
-    phone = Column(String(20))
+    name: Mapped[str] = mapped_column(String(255), nullable=False)  # Nome completo ou razão social
+    trade_name: Mapped[Optional[str]] = mapped_column(String(255))  # Nome fantasia
+    document: Mapped[str] = mapped_column(String(20), nullable=False)  # CPF ou CNPJ
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    phone: Mapped[Optional[str]] = mapped_column(String(20))
 
     # Produto/Sistema (enterprise, diario, botwhatsapp, condotech)
-    product_code = Column(String(50), default="enterprise", nullable=False)
+    product_code: Mapped[str] = mapped_column(String(50), default="enterprise", nullable=False)
 
     # Configurações do banco de dados (único por produto)
-    database_name = Column(String(100))  # Nome do banco: cliente_{document}
-    database_host = Column(String(255), default="localhost")
-    database_port = Column(Integer, default=5432)
-    database_user = Column(String(100))
-    database_password = Column(String(255))  # Criptografado
+    database_name: Mapped[Optional[str]] = mapped_column(String(100))  # Nome do banco: cliente_{document}
+    database_host: Mapped[Optional[str]] = mapped_column(String(255), default="localhost")
+    database_port: Mapped[Optional[int]] = mapped_column(Integer, default=5432)
+    database_user: Mapped[Optional[str]] = mapped_column(String(100))
+    # Texto puro: nenhum caminho cifra/decifra esta coluna, e database_url
+    # abaixo repete a senha. Cifrar exige migrar os dados e os dois campos.
+    database_password: Mapped[Optional[str]] = mapped_column(String(255))
 
     # URL completa de conexão (gerada automaticamente)
-    database_url = Column(Text)
+    database_url: Mapped[Optional[str]] = mapped_column(Text)
 
     # Configurações de acesso
-    subdomain = Column(String(50), unique=True)  # Opcional: empresa.tech-emp.com
-    custom_domain = Column(String(255))  # Opcional: sistema.empresa.com
-    api_url = Column(String(500))  # URL da API Gateway para este tenant
+    subdomain: Mapped[Optional[str]] = mapped_column(String(50), unique=True)  # Opcional: empresa.tech-emp.com
+    custom_domain: Mapped[Optional[str]] = mapped_column(String(255))  # Opcional: sistema.empresa.com
+    api_url: Mapped[Optional[str]] = mapped_column(String(500))  # URL da API Gateway para este tenant
 
     # Credenciais de primeiro acesso (geradas no cadastro)
-    initial_password_hash = Column(String(255))  # Hash do CPF/CNPJ
-    password_changed = Column(Boolean, default=False)  # Se usuário já trocou a senha
+    initial_password_hash: Mapped[Optional[str]] = mapped_column(String(255), deferred=True)  # Hash do CPF/CNPJ (só gravado no cadastro)
+    password_changed: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)  # Se usuário já trocou a senha
 
     # Referência ao cliente no sistema de licenças
-    client_id = Column(String(36), ForeignKey("clients.id"), nullable=True)
+    client_id: Mapped[Optional[str]] = mapped_column(String(36), ForeignKey("clients.id"), nullable=True)
 
     # Status e controle
-    status = Column(String(20), default=TenantStatus.PENDING.value)
-    is_trial = Column(Boolean, default=True)
-    trial_days = Column(Integer, default=30)
+    status: Mapped[Optional[TenantStatus]] = mapped_column(pg_enum(TenantStatus, "tenant_status"), default=TenantStatus.PENDING.value)
+    is_trial: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
+    trial_days: Mapped[Optional[int]] = mapped_column(Integer, default=30)
 
     # Datas importantes
-    registered_at = Column(DateTime, default=datetime.utcnow)  # Data do cadastro
-    provisioned_at = Column(DateTime)  # Data que banco foi criado
-    activated_at = Column(DateTime)  # Data que usuário ativou
-    trial_expires_at = Column(DateTime)  # Data que trial expira
-    suspended_at = Column(DateTime)  # Data que foi suspenso
-    cancelled_at = Column(DateTime)  # Data que foi cancelado
+    registered_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)  # Data do cadastro
+    provisioned_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Data que banco foi criado
+    activated_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Data que usuário ativou
+    trial_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Data que trial expira
+    suspended_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Data que foi suspenso
+    cancelled_at: Mapped[Optional[datetime]] = mapped_column(DateTime)  # Data que foi cancelado
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=utcnow(), onupdate=utcnow())
 
     # Metadados extras
-    metadata_ = Column("metadata", JSON, default=dict)
-    notes = Column(Text)
+    metadata_: Mapped[Optional[dict]] = mapped_column("metadata", JSONType, default=dict)
+    notes: Mapped[Optional[str]] = mapped_column(Text)
 
     # Relacionamentos
-    client = relationship("Client", backref="tenant", uselist=False)
+    client: Mapped[Optional["Client"]] = relationship("Client", backref="tenant", uselist=False)
+
+    @staticmethod
+    def _digits(document: str) -> str:
+        """Somente os dígitos do documento"""
+        return _NON_DIGITS.sub('', document)
+
+    @staticmethod
+    def generate_identifiers(document: str) -> tuple:
+        """Gera (tenant_code, database_name, database_user) limpando o documento uma só vez"""
+        numbers = Tenant._digits(document)
+        return numbers, f"cliente_{numbers}", f"user_{numbers}"
 
     @staticmethod
     def generate_tenant_code(document: str) -> str:
         """Gera código do tenant baseado no documento (CPF/CNPJ)"""
-        # Remove caracteres não numéricos
-        numbers = ''.join(filter(str.isdigit, document))
-        return numbers
+        return Tenant._digits(document)
 
     @staticmethod
     def generate_database_name(document: str) -> str:
         """Gera nome do banco de dados baseado no documento"""
-        numbers = ''.join(filter(str.isdigit, document))
-        return f"cliente_{numbers}"
+        return f"cliente_{Tenant._digits(document)}"
 
     @staticmethod
     def generate_database_user(document: str) -> str:
         """Gera usuário do banco de dados"""
-        numbers = ''.join(filter(str.isdigit, document))
-        return f"user_{numbers}"
+        return f"user_{Tenant._digits(document)}"
 
     @staticmethod
     def generate_database_password() -> str:
@@ -140,8 +158,9 @@ class Tenant(Base):
             f"@{self.database_host}:{self.database_port}/{self.database_name}"
         )
 
-    def is_trial_valid(self) -> bool:
-        """Verifica se o trial ainda é válido"""
+    @hybrid_property
+    def is_trial_effective(self) -> bool:
+        """Não é trial, ou o trial ainda não expirou"""
         if not self.is_trial:
             return True  # Não é trial, está OK
 
@@ -150,6 +169,22 @@ class Tenant(Base):
 
         return datetime.utcnow() < self.trial_expires_at
 
+    @is_trial_effective.expression
+    def is_trial_effective(cls):
+        # Mesma regra em SQL: select(Tenant).where(Tenant.is_trial_effective)
+        # filtra e conta no banco, sem carregar os tenants.
+        # Coluna via expressão (e não Computed): coluna gerada no Postgres
+        # exige expressão imutável, e now() não é. trial_expires_at é UTC
+        # sem fuso, por isso utcnow() e não func.now().
+        return or_(
+            cls.is_trial.is_(False),
+            and_(cls.trial_expires_at.isnot(None), cls.trial_expires_at > utcnow()),
+        )
+
+    def is_trial_valid(self) -> bool:
+        """Verifica se o trial ainda é válido"""
+        return self.is_trial_effective
+
     def to_dict(self, include_sensitive: bool = False):
         """Converte para dicionário"""
         data = {
@@ -167,11 +202,11 @@ class Tenant(Base):
             "is_trial": self.is_trial,
             "trial_days": self.trial_days,
             "password_changed": self.password_changed,
-            "registered_at": self.registered_at.isoformat() if self.registered_at else None,
-            "provisioned_at": self.provisioned_at.isoformat() if self.provisioned_at else None,
-            "activated_at": self.activated_at.isoformat() if self.activated_at else None,
-            "trial_expires_at": self.trial_expires_at.isoformat() if self.trial_expires_at else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "registered_at": self.registered_at,
+            "provisioned_at": self.provisioned_at,
+            "activated_at": self.activated_at,
+            "trial_expires_at": self.trial_expires_at,
+            "created_at": self.created_at,
             "is_trial_valid": self.is_trial_valid(),
             "client_id": self.client_id
         }
@@ -3,6 +3,7 @@ from .license import (
     LicenseCreate,
     LicenseUpdate,
     LicenseResponse,
+    LicenseDict,
     LicenseActivateRequest,
     LicenseValidateRequest,
     LicenseValidateResponse,
@@ -26,6 +27,7 @@ __all__ = [
     "LicenseCreate",
     "LicenseUpdate",
     "LicenseResponse",
+    "LicenseDict",
     "LicenseActivateRequest",
     "LicenseValidateRequest",
     "LicenseValidateResponse",
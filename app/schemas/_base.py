@@ -0,0 +1,19 @@
+"""
+License Server - Schema Base
+Base comum dos schemas de resposta
+"""
+from pydantic import BaseModel, ConfigDict
+
+
+class ORMModel(BaseModel):
+    """
+    Schema de resposta: aceita objetos ORM (from_attributes), monta o
+    validador só no primeiro uso (defer_build) e ignora campos extras.
+    A config é declarada uma vez aqui e herdada pelas subclasses.
+    """
+    model_config = ConfigDict(
+        from_attributes=True,
+        defer_build=True,
+        extra='ignore',
+        populate_by_name=True,
+    )
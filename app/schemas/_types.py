@@ -0,0 +1,43 @@
+"""
+License Server - Schema Types
+Tipos anotados compartilhados pelos schemas
+"""
+import re
+from typing import Annotated
+
+from pydantic import AfterValidator, BeforeValidator
+
+# Linear (sem .* nem backtracking): um @, sem espaços, TLD de 2+ caracteres
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]{2,}$')
+
+# Caracteres válidos da chave de licença (removidos pelo bytes.translate)
+_KEY_CHARS = b'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+
+
+def _check_email_regex(v):
+    if not isinstance(v, str):
+        raise ValueError('E-mail inválido')
+    v = v.strip()
+    if not _EMAIL_RE.match(v):
+        raise ValueError('E-mail inválido')
+    # Domínio em minúsculas, como a normalização do EmailStr
+    local, _, domain = v.rpartition('@')
+    return f"{local}@{domain.lower()}"
+
+
+# E-mail checado só por regex compilada. Para formulários internos e login;
+# o cadastro (que envia e-mail ao endereço) continua com EmailStr completo.
+FastEmail = Annotated[str, BeforeValidator(_check_email_regex)]
+
+
+def _check_license_key(v: str) -> str:
+    # XXXX-XXXX-XXXX-XXXX: tamanho e hífens nas posições fixas; removidos os
+    # caracteres válidos numa chamada em C, só podem sobrar os 3 hífens
+    if (len(v) != 19 or v[4] != '-' or v[9] != '-' or v[14] != '-'
+            or not v.isascii() or v.encode().translate(None, _KEY_CHARS) != b'---'):
+        raise ValueError('Chave de licença inválida (formato XXXX-XXXX-XXXX-XXXX)')
+    return v
+
+
+# Chave de licença validada sem regex
+LicenseKey = Annotated[str, AfterValidator(_check_license_key)]
@@ -1,16 +1,20 @@
 """
 License Server - Auth Schemas
 """
+from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 
+from ._base import ORMModel
+from ._types import FastEmail
+
 
 class LoginRequest(BaseModel):
-    email: EmailStr
+    email: FastEmail
     password: str = Field(..., min_length=6)
 
 
-class LoginResponse(BaseModel):
+class LoginResponse(ORMModel):
     access_token: str
     token_type: str = "bearer"
     user: dict
@@ -23,14 +27,11 @@ class AdminUserCreate(BaseModel):
     is_superadmin: bool = False
 
 
-class AdminUserResponse(BaseModel):
+class AdminUserResponse(ORMModel):
     id: str
     email: str
     full_name: Optional[str]
     is_active: bool
     is_superadmin: bool
-    last_login_at: Optional[str]
-    created_at: Optional[str]
-
-    class Config:
-        from_attributes = True
+    last_login_at: Optional[datetime]
+    created_at: Optional[datetime]
@@ -1,15 +1,18 @@
 """
 License Server - Client Schemas
 """
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
+from ._base import ORMModel
+from ._types import FastEmail
+
 
 class ClientCreate(BaseModel):
     name: str = Field(..., min_length=2, max_length=255)
     document: Optional[str] = Field(None, max_length=20)
-    email: EmailStr
+    email: FastEmail
     phone: Optional[str] = Field(None, max_length=20)
     contact_name: Optional[str] = Field(None, max_length=255)
     address: Optional[str] = None
@@ -22,7 +25,7 @@ class ClientCreate(BaseModel):
 class ClientUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=2, max_length=255)
     document: Optional[str] = Field(None, max_length=20)
-    email: Optional[EmailStr] = None
+    email: Optional[FastEmail] = None
     phone: Optional[str] = Field(None, max_length=20)
     contact_name: Optional[str] = Field(None, max_length=255)
     address: Optional[str] = None
@@ -32,8 +35,17 @@ class ClientUpdate(BaseModel):
     is_active: Optional[bool] = None
     notes: Optional[str] = None
 
+    @classmethod
+    def from_trusted(cls, data: dict) -> "ClientUpdate":
+        """
+        Monta o update sem passar pelo validador (uso interno: scripts e
+        serviços com dados já validados). Requisições HTTP continuam pelo
+        caminho validado do FastAPI.
+        """
+        return cls.model_construct(_fields_set=set(data), **data)
+
 
-class ClientResponse(BaseModel):
+class ClientResponse(ORMModel):
     id: str
     name: str
     document: Optional[str] = None
@@ -49,6 +61,3 @@ class ClientResponse(BaseModel):
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     licenses_count: int = 0
-
-    class Config:
-        from_attributes = True
@@ -1,13 +1,25 @@
 """
 License Server - License Schemas
 """
-from pydantic import BaseModel, Field
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime
-from app.models.license import LicensePlan, LicenseStatus
+import msgspec
 
+from ._base import ORMModel
+from ._types import LicenseKey
+from app.models.license import License, LicensePlan, LicenseStatus
 
+
+# defer_build: o validador (pydantic-core) de cada schema só é montado no
+# primeiro uso, e não no import do módulo
 class LicenseCreate(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     client_id: str
     plan: str = LicensePlan.STARTER.value
     features: Optional[List[str]] = None
@@ -22,6 +34,8 @@ class LicenseCreate(BaseModel):
 
 
 class LicenseUpdate(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+
     plan: Optional[str] = None
     features: Optional[List[str]] = None
     max_users: Optional[int] = Field(None, ge=1, le=1000)
@@ -32,15 +46,22 @@ class LicenseUpdate(BaseModel):
     status: Optional[str] = None
     notes: Optional[str] = None
 
+    @classmethod
+    def from_trusted(cls, data: dict) -> LicenseUpdate:
+        """Update a partir de dados já validados, sem validador (ver ClientUpdate.from_trusted)"""
+        return cls.model_construct(_fields_set=set(data), **data)
+
 
-class LicenseResponse(BaseModel):
+class LicenseResponse(ORMModel):
     id: str
     license_key: str
     client_id: str
     client_name: Optional[str] = None
     hardware_id: Optional[str] = None
+    # Colunas anuláveis (default só no Python; PATCH aceita null): Optional.
+    # features/metadata são sempre preenchidos por to_dict() ([] / {}).
     plan: Optional[str] = "starter"
-    features: Optional[List[str]] = []
+    features: List[str] = []
     max_users: Optional[int] = 1
     max_customers: Optional[int] = 100
     max_products: Optional[int] = 100
@@ -51,8 +72,8 @@ class LicenseResponse(BaseModel):
     last_validated_at: Optional[datetime] = None
     status: Optional[str] = "active"
     is_trial: Optional[bool] = False
-    is_valid: Optional[bool] = True
-    days_until_expiry: Optional[int] = 0
+    is_valid: bool = True
+    days_until_expiry: int = 0
     created_at: Optional[datetime] = None
     # Campo livre gravado na emissão. É por ele que o painel sabe de qual
     # produto é a licença — o Radar grava {"produto": "radar", "oab": ...}.
@@ -62,15 +83,77 @@ class LicenseResponse(BaseModel):
     # `alias="metadata_"` aqui faria o FastAPI SERIALIZAR com o nome do alias
     # (response_model_by_alias vem True por padrão), e a API devolveria
     # "metadata_" — que é justamente o nome que o painel não procura.
-    metadata: Optional[dict] = None
+    metadata: dict = {}
 
-    class Config:
-        from_attributes = True
+
+class LicenseDict(msgspec.Struct):
+    """
+    Mesmo formato de `License.to_dict()`, como struct do msgspec.
+    Usado nas listagens: serializado direto em C, sem dict intermediário
+    nem validação Pydantic na saída.
+    """
+    id: str
+    license_key: str
+    client_id: str
+    client_name: Optional[str]
+    hardware_id: Optional[str]
+    plan: Optional[str]
+    features: list
+    max_users: Optional[int]
+    max_customers: Optional[int]
+    max_products: Optional[int]
+    max_monthly_transactions: Optional[int]
+    issued_at: Optional[datetime]
+    activated_at: Optional[datetime]
+    expires_at: Optional[datetime]
+    last_validated_at: Optional[datetime]
+    status: Optional[str]
+    is_trial: Optional[bool]
+    is_valid: bool
+    days_until_expiry: int
+    created_at: Optional[datetime]
+    metadata: dict
+
+    @classmethod
+    def from_license(cls, lic) -> "LicenseDict":
+        # Validade vem do SELECT (undefer de sql_is_valid/sql_days_until_expiry)
+        return cls(
+            id=lic.id,
+            license_key=lic.license_key,
+            client_id=lic.client_id,
+            client_name=lic.client.name if lic.client else None,
+            hardware_id=lic.hardware_id,
+            plan=lic.plan,
+            features=lic.features or [],
+            max_users=lic.max_users,
+            max_customers=lic.max_customers,
+            max_products=lic.max_products,
+            max_monthly_transactions=lic.max_monthly_transactions,
+            issued_at=lic.issued_at,
+            activated_at=lic.activated_at,
+            expires_at=lic.expires_at,
+            last_validated_at=lic.last_validated_at,
+            status=lic.status,
+            is_trial=lic.is_trial,
+            is_valid=bool(lic.sql_is_valid),
+            days_until_expiry=lic.sql_days_until_expiry,
+            created_at=lic.created_at,
+            metadata=lic.metadata_ or {},
+        )
+
+
+# A listagem sai por LicenseDict e o detalhe por License.to_dict(): os dois
+# precisam ter os mesmos campos. Confere uma vez, no import.
+_campos_divergentes = set(License().to_dict()) ^ set(LicenseDict.__struct_fields__)
+if _campos_divergentes:
+    raise RuntimeError(f"LicenseDict e License.to_dict() divergem: {sorted(_campos_divergentes)}")
 
 
 class LicenseActivateRequest(BaseModel):
     """Request para ativar licença"""
-    license_key: str = Field(..., pattern=r'^[A-Z0-9]{4}-[A-Z0-9]{4}-[A-Z0-9]{4}-[A-Z0-9]{4}$')
+    model_config = ConfigDict(defer_build=True)
+
+    license_key: LicenseKey
     hardware_id: str = Field(..., min_length=16, max_length=64)
     hardware_info: Optional[dict] = None
     app_version: Optional[str] = None
@@ -78,6 +161,8 @@ class LicenseActivateRequest(BaseModel):
 
 class LicenseValidateRequest(BaseModel):
     """Request para validar licença (heartbeat)"""
+    model_config = ConfigDict(defer_build=True)
+
     license_key: str
     hardware_id: str
     current_users: Optional[int] = None
@@ -86,7 +171,7 @@ class LicenseValidateRequest(BaseModel):
     app_version: Optional[str] = None
 
 
-class LicenseValidateResponse(BaseModel):
+class LicenseValidateResponse(ORMModel):
     """Response da validação"""
     valid: bool
     status: str
@@ -100,8 +185,10 @@ class LicenseValidateResponse(BaseModel):
     signature: Optional[str] = None
 
 
-class LicenseFileResponse(BaseModel):
-    """Arquivo de licença para download"""
+@dataclass(slots=True, frozen=True)
+class LicenseFileResponse:
+    """Arquivo de licença para download (só serializado, nunca validado:
+    dataclass com slots em vez de BaseModel)"""
     license_key: str
     client_id: str
     client_name: str
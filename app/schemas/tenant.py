@@ -5,8 +5,30 @@ Schemas para o sistema de multi-tenant
 from pydantic import BaseModel, Field, EmailStr, field_validator
 from typing import Optional
 from datetime import datetime
+from operator import mul
 import re
 
+from ._base import ORMModel
+from ._types import FastEmail, LicenseKey
+
+# Compilado uma vez (re.sub com string consulta o cache de regex a cada chamada)
+_NON_DIGIT = re.compile(r'\D')
+
+# Pesos dos dígitos verificadores (CPF: 10..2 e 11..2)
+_CPF_W1 = tuple(range(10, 1, -1))
+_CPF_W2 = tuple(range(11, 1, -1))
+_CNPJ_W1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_CNPJ_W2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+def _check_digit(digits: bytes, weights: tuple) -> int:
+    """Dígito verificador (soma ponderada módulo 11) sobre os bytes ASCII.
+    sum(map(mul, ...)) roda inteiro em C; o '0' (48) de cada byte é
+    descontado de uma vez no fim. zip implícito: usa len(weights) dígitos."""
+    total = sum(map(mul, digits, weights)) - 48 * sum(weights)
+    remainder = total % 11
+    return 0 if remainder < 2 else 11 - remainder
+
 
 class TenantRegisterRequest(BaseModel):
     """Request para registro de novo tenant (trial)"""
@@ -21,7 +43,7 @@ class TenantRegisterRequest(BaseModel):
     @classmethod
     def validate_document(cls, v):
         # Remove caracteres não numéricos
-        numbers = re.sub(r'\D', '', v)
+        numbers = _NON_DIGIT.sub('', v)
 
         if len(numbers) == 11:
             # Validação de CPF
@@ -39,7 +61,7 @@ class TenantRegisterRequest(BaseModel):
     @field_validator('phone')
     @classmethod
     def validate_phone(cls, v):
-        numbers = re.sub(r'\D', '', v)
+        numbers = _NON_DIGIT.sub('', v)
         if len(numbers) < 10 or len(numbers) > 11:
             raise ValueError('Telefone deve ter 10 ou 11 dígitos')
         return numbers
@@ -50,12 +72,9 @@ class TenantRegisterRequest(BaseModel):
         if len(cpf) != 11 or cpf == cpf[0] * 11:
             return False
 
-        def calc_digit(cpf, factor):
-            total = sum(int(digit) * (factor - i) for i, digit in enumerate(cpf[:factor - 1]))
-            remainder = total % 11
-            return 0 if remainder < 2 else 11 - remainder
-
-        return calc_digit(cpf, 10) == int(cpf[9]) and calc_digit(cpf, 11) == int(cpf[10])
+        digits = cpf.encode()
+        return (_check_digit(digits, _CPF_W1) == digits[9] - 48 and
+                _check_digit(digits, _CPF_W2) == digits[10] - 48)
 
     @staticmethod
     def _validate_cnpj(cnpj: str) -> bool:
@@ -63,19 +82,12 @@ class TenantRegisterRequest(BaseModel):
         if len(cnpj) != 14 or cnpj == cnpj[0] * 14:
             return False
 
-        def calc_digit(cnpj, weights):
-            total = sum(int(digit) * weight for digit, weight in zip(cnpj, weights))
-            remainder = total % 11
-            return 0 if remainder < 2 else 11 - remainder
-
-        weights1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        weights2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+        digits = cnpj.encode()
+        return (_check_digit(digits, _CNPJ_W1) == digits[12] - 48 and
+                _check_digit(digits, _CNPJ_W2) == digits[13] - 48)
 
-        return (calc_digit(cnpj, weights1) == int(cnpj[12]) and
-                calc_digit(cnpj, weights2) == int(cnpj[13]))
 
-
-class TenantRegisterResponse(BaseModel):
+class TenantRegisterResponse(ORMModel):
     """Response do registro de tenant"""
     success: bool
     message: str
@@ -88,7 +100,7 @@ class TenantRegisterResponse(BaseModel):
     activation_url: Optional[str] = None
 
 
-class TenantResponse(BaseModel):
+class TenantResponse(ORMModel):
     """Response com dados do tenant"""
     id: str
     tenant_code: str
@@ -110,23 +122,20 @@ class TenantResponse(BaseModel):
     client_id: Optional[str] = None
     license_key: Optional[str] = None  # Chave de licença para exibição
 
-    class Config:
-        from_attributes = True
-
 
 class TenantActivateRequest(BaseModel):
     """Request para ativar tenant com license key"""
-    license_key: str = Field(..., pattern=r'^[A-Z0-9]{4}-[A-Z0-9]{4}-[A-Z0-9]{4}-[A-Z0-9]{4}$')
+    license_key: LicenseKey
     hardware_id: str = Field(..., min_length=16, max_length=64)
 
 
 class TenantLoginRequest(BaseModel):
     """Request para login do tenant"""
-    email: EmailStr
+    email: FastEmail
     password: str = Field(..., min_length=1)
 
 
-class TenantLoginResponse(BaseModel):
+class TenantLoginResponse(ORMModel):
     """Response do login do tenant"""
     success: bool
     message: str
@@ -0,0 +1,105 @@
+"""
+License Server - License Service
+Cache das leituras de licença no caminho de heartbeat (/v1/validate).
+
+O mesmo cliente valida a mesma chave o tempo todo; a leitura passa por um
+TTLCache por processo (30s) com só os campos que a validação usa — nunca o
+objeto ORM, que ficaria preso à sessão. Qualquer UPDATE/DELETE de License
+feito pelo ORM invalida a entrada (eventos do mapper, de novo após o commit);
+o TTL limita o atraso entre workers diferentes.
+"""
+
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.models.license import License
+
+CACHE_MAXSIZE = 10_000
+CACHE_TTL_SECONDS = 30
+
+
+class LicenseSnapshot(NamedTuple):
+    """Campos da licença usados pela validação"""
+    id: str
+    license_key: str
+    status: str
+    expires_at: Optional[datetime]
+    hardware_id: Optional[str]
+    signature: Optional[str]
+    plan: Optional[str]
+    features: Optional[list]
+    max_users: Optional[int]
+    max_customers: Optional[int]
+    max_products: Optional[int]
+    max_monthly_transactions: Optional[int]
+
+    def days_until_expiry(self, now: datetime) -> int:
+        """Dias até expirar (mesma regra de License.days_until_expiry)"""
+        if not self.expires_at:
+            return 999
+        return max(0, (self.expires_at - now).days)
+
+
+_SNAPSHOT_COLUMNS = tuple(getattr(License, field) for field in LicenseSnapshot._fields)
+
+_cache: TTLCache = TTLCache(maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL_SECONDS)
+
+
+async def get_license_snapshot(db: AsyncSession, license_key: str) -> Optional[LicenseSnapshot]:
+    """Retorna a licença pela chave, do cache quando possível"""
+    snapshot = _cache.get(license_key)
+    if snapshot is not None:
+        return snapshot
+
+    result = await db.execute(
+        select(*_SNAPSHOT_COLUMNS).where(License.license_key == license_key)
+    )
+    row = result.first()
+    if row is None:
+        return None
+
+    snapshot = LicenseSnapshot(*row)
+    _cache[license_key] = snapshot
+    return snapshot
+
+
+def invalidate_license(license_key: str):
+    """Remove a licença do cache (chamar após UPDATE fora do ORM)"""
+    _cache.pop(license_key, None)
+
+
+def _affected_keys(target: License) -> set:
+    """Chave atual e, se a chave mudou neste flush, a anterior"""
+    keys = {target.license_key}
+    keys.update(inspect(target).attrs.license_key.history.deleted or ())
+    return keys
+
+
+@event.listens_for(License, "after_update")
+@event.listens_for(License, "after_delete")
+def _invalidate_on_write(mapper, connection, target):
+    # O flush acontece antes do commit: uma validação concorrente ainda lê a
+    # linha antiga e pode recolocá-la no cache. Invalida já e guarda as
+    # chaves para invalidar de novo depois do commit.
+    keys = _affected_keys(target)
+    for key in keys:
+        invalidate_license(key)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("license_keys_to_invalidate", set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for key in session.info.pop("license_keys_to_invalidate", ()):
+        invalidate_license(key)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session, previous_transaction):
+    session.info.pop("license_keys_to_invalidate", None)
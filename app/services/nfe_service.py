@@ -6,38 +6,41 @@ para emissao, consulta, cancelamento e inutilizacao de NF-e.
 
 Utiliza as bibliotecas:
 - lxml: Manipulacao de XML
-- signxml: Assinatura digital XML
-- zeep: Cliente SOAP para web services
-- cryptography: Manipulacao de certificados digitais
+- cryptography: Certificados digitais e assinatura XML (sign_nfe_inline)
+- httpx: Envio SOAP para os web services (AsyncClient com pool de conexoes)
 
 Documentacao SEFAZ: https://www.nfe.fazenda.gov.br/portal/principal.aspx
 """
 
+import asyncio
 import logging
 import hashlib
 import base64
+import importlib.util
 import tempfile
 import os
-import ssl
 import io
+import secrets
+import ssl
+import threading
+import time
+from copy import deepcopy
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any, Tuple
-from decimal import Decimal
-from lxml import etree
-from cryptography.hazmat.primitives.serialization import pkcs12
-from cryptography.hazmat.primitives.serialization import Encoding, PrivateFormat, NoEncryption
-from cryptography.hazmat.backends import default_backend
-from cryptography import x509
-from cryptography.fernet import Fernet
-from signxml import XMLSigner, XMLVerifier
-from signxml.algorithms import SignatureMethod, DigestAlgorithm
-import zeep
-from zeep.transports import Transport
-from zeep.wsse.signature import Signature
-import requests
-from requests.adapters import HTTPAdapter
+from functools import lru_cache
+from operator import mul
+from typing import Optional, Dict, Any, List, Tuple
 import asyncpg
-import uuid
+import msgspec
+from cachetools import TTLCache
+
+# lxml, cryptography e httpx sao importados dentro das funcoes
+# que os usam: o import deste modulo (feito pelo gateway na subida) nao
+# carrega a pilha XML/assinatura/HTTP, paga so na primeira NF-e.
+# Sem as dependencias, o import ainda falha aqui, como antes: o gateway
+# usa o ImportError para marcar NFE_SERVICE_AVAILABLE = False.
+for _dep in ('lxml', 'cryptography', 'httpx'):
+    if importlib.util.find_spec(_dep) is None:
+        raise ImportError(f"No module named '{_dep}'")
 
 logger = logging.getLogger(__name__)
 
@@ -140,7 +143,7 @@ SEFAZ_URLS_HOMOLOGACAO = {
 }
 
 # Estados que usam SVRS (SEFAZ Virtual RS)
-UF_SVRS = ['AC', 'AL', 'AP', 'DF', 'ES', 'PB', 'PI', 'RJ', 'RN', 'RO', 'RR', 'SC', 'SE', 'TO']
+UF_SVRS = frozenset({'AC', 'AL', 'AP', 'DF', 'ES', 'PB', 'PI', 'RJ', 'RN', 'RO', 'RR', 'SC', 'SE', 'TO'})
 
 # Codigo UF IBGE
 CODIGO_UF = {
@@ -151,11 +154,352 @@ CODIGO_UF = {
     'SP': '35', 'SE': '28', 'TO': '17'
 }
 
+# Indice (uf, servico, ambiente) -> URL, montado uma vez no import: a
+# resolucao SVRS / autorizador proprio fica resolvida aqui, e a consulta
+# em get_sefaz_url vira um unico acesso ao dict. UF sem autorizador
+# proprio cai no SVRS, como antes. A chave 'SVRS' fica para UFs fora da
+# tabela do IBGE.
+_URL_INDEX: Dict[Tuple[str, str, int], str] = {
+    (uf, servico, 2): url
+    for uf in (*CODIGO_UF, 'SVRS')
+    for servico, url in SEFAZ_URLS_HOMOLOGACAO[
+        'SVRS' if uf in UF_SVRS or uf not in SEFAZ_URLS_HOMOLOGACAO else uf
+    ].items()
+}
+
+def _s(dados: Dict[str, Any], campo: str, tamanho: int, padrao: str = '') -> str:
+    """Campo texto truncado ao tamanho do leiaute (so fatia quando excede)"""
+    valor = dados.get(campo, padrao)
+    return valor if len(valor) <= tamanho else valor[:tamanho]
+
+
+# Pesos do DV modulo 11 da chave de acesso (2..9 repetidos, cobre os 43
+# digitos com folga)
+_DV_PESOS = (2, 3, 4, 5, 6, 7, 8, 9) * 8
+# Soma dos n primeiros pesos, para descontar o '0' (48) dos bytes
+_DV_PESOS_ACUM = tuple(sum(_DV_PESOS[:n]) for n in range(len(_DV_PESOS) + 1))
+
+# Pontuacao removida de CNPJ/CPF, CEP e telefone: uma passada de translate em
+# vez de um .replace (e uma string nova) por caractere
+_DOC_TRANS = str.maketrans('', '', './-')
+_FONE_TRANS = str.maketrans('', '', '()- ')
+
 # Namespace da NF-e 4.0
 NFE_NAMESPACE = 'http://www.portalfiscal.inf.br/nfe'
 NSMAP = {None: NFE_NAMESPACE}
 
 
+class _QNames(dict):
+    """QName do namespace da NF-e por nome de tag, criado no primeiro uso
+    (lxml so e importado ai) e reaproveitado: sem formatar '{ns}tag' nem
+    reinterpretar a string a cada elemento."""
+
+    def __missing__(self, name: str):
+        from lxml import etree
+
+        qname = self[name] = etree.QName(NFE_NAMESPACE, name)
+        return qname
+
+
+_Q = _QNames()
+
+
+# XMLDSig exigido pela SEFAZ (NF-e 4.00): RSA-SHA1, digest SHA1, C14N inclusivo
+_DSIG_NS = 'http://www.w3.org/2000/09/xmldsig#'
+_C14N_ALG = 'http://www.w3.org/TR/2001/REC-xml-c14n-20010315'
+
+# Tags da assinatura e caminhos de busca em notacao Clark, montados uma vez
+_DS = {
+    name: '{%s}%s' % (_DSIG_NS, name)
+    for name in (
+        'Signature', 'SignedInfo', 'CanonicalizationMethod', 'SignatureMethod',
+        'Reference', 'Transforms', 'Transform', 'DigestMethod', 'DigestValue',
+        'SignatureValue', 'KeyInfo', 'X509Data', 'X509Certificate',
+    )
+}
+_FIND_INFNFE = './/{%s}infNFe' % NFE_NAMESPACE
+_FIND_INFEVENTO = './/{%s}infEvento' % NFE_NAMESPACE
+
+_UTC = timezone.utc
+
+# Status do servico por (UF, ambiente): (instante monotonic, resultado).
+# A SEFAZ recomenda nao consultar o status a cada emissao.
+STATUS_CACHE_TTL = 30
+_status_cache: Dict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = {}
+_status_locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+
+# Carimbo AAAAMMDDHHMMSS (hora local) dos campos nao assinados: protocolos
+# simulados e idLote. Reaproveitado enquanto o relogio monotonico nao avanca
+# ~1s (monotonic_ns >> 30), em vez de datetime.now() + strftime por chamada.
+# dhEmi/dhEvento, que entram na assinatura, continuam com datetime.now().
+_carimbo_tick = -1
+_carimbo_valor = ''
+
+
+def _carimbo() -> str:
+    global _carimbo_tick, _carimbo_valor
+    tick = time.monotonic_ns() >> 30
+    if tick != _carimbo_tick:
+        _carimbo_valor = datetime.now().strftime('%Y%m%d%H%M%S')
+        _carimbo_tick = tick
+    return _carimbo_valor
+
+
+def _data_hora_sefaz(dt: datetime) -> str:
+    """dhEmi/dhEvento (AAAA-MM-DDTHH:MM:SS-03:00). isoformat + corte e mais
+    rapido que strftime, que interpreta o formato a cada chamada."""
+    return f"{dt.isoformat(timespec='seconds')[:19]}-03:00"
+
+# Certificados A1 ja abertos: o PKCS12 roda PBKDF2 a cada abertura (dezenas
+# de ms). Chave = digest BLAKE2b do .pfx + senha, para nao guardar segredo
+# como chave. O TTL cobre a troca de certificado pelo tenant.
+_CERT_CACHE: TTLCache = TTLCache(maxsize=256, ttl=3600)
+# TTLCache nao e thread-safe e a emissao abre o certificado fora do event loop
+_CERT_CACHE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def _nfe_maker():
+    """ElementMaker do namespace da NF-e (lxml importado no primeiro uso).
+    Monta cada elemento ja com tag qualificada e texto numa chamada, em vez
+    de SubElement + '{ns}tag' % ... + .text por campo."""
+    from lxml.builder import ElementMaker
+
+    # Campo None vira elemento vazio, como no antigo `.text = None`
+    return ElementMaker(
+        namespace=NFE_NAMESPACE,
+        nsmap=NSMAP,
+        typemap={type(None): lambda elem, value: None},
+    )
+
+
+# Campos de ide que mudam por nota, pela posicao no leiaute; os demais
+# (tpNF, tpImp, finNFe, indFinal, indPres, procEmi, verProc) vem do modelo
+_IDE_VARIAVEIS = (0, 1, 2, 3, 4, 5, 6, 8, 9, 11, 12, 13)
+
+# Posicoes dos totais variaveis dentro de ICMSTot (ordem do leiaute)
+_ICMSTOT_VPROD = 11
+_ICMSTOT_VFRETE = 12
+_ICMSTOT_VDESC = 14
+_ICMSTOT_VNF = 21
+
+
+@lru_cache(maxsize=None)
+def _blocos_fixos():
+    """
+    Blocos iguais em toda NF-e deste emissor, montados uma vez: ide (vazio
+    nas posicoes _IDE_VARIAVEIS), det de um item do Simples Nacional (campos
+    do produto e CST/CSOSN vazios), ICMSTot (zerado, exceto os totais nas
+    posicoes _ICMSTOT_*) e transp sem frete.
+    Cada nota usa uma copia (deepcopy, em C) em vez de montar campo a campo.
+    """
+    E = _nfe_maker()
+    ide = E.ide(
+        E.cUF(),
+        E.cNF(),
+        E.natOp(),
+        E.mod(),
+        E.serie(),
+        E.nNF(),
+        E.dhEmi(),
+        E.tpNF('1'),  # 1=Saida
+        E.idDest(),
+        E.cMunFG(),
+        E.tpImp('1'),  # DANFE retrato
+        E.tpEmis(),
+        E.cDV(),
+        E.tpAmb(),
+        E.finNFe('1'),  # NF-e normal
+        E.indFinal('1'),  # Consumidor final
+        E.indPres('1'),  # Presencial
+        E.procEmi('0'),  # Emissao propria
+        E.verProc('Enterprise System 1.0'),
+    )
+    det = E.det(
+        E.prod(
+            E.cProd(),
+            E.cEAN(),
+            E.xProd(),
+            E.NCM(),
+            E.CFOP(),
+            E.uCom(),
+            E.qCom(),
+            E.vUnCom(),
+            E.vProd(),
+            E.cEANTrib(),
+            E.uTrib(),
+            E.qTrib(),
+            E.vUnTrib(),
+            E.indTot('1'),  # Compoe total
+        ),
+        E.imposto(
+            E.ICMS(
+                E.ICMSSN102(  # Simples Nacional
+                    E.orig(),
+                    E.CSOSN(),
+                ),
+            ),
+            E.PIS(
+                E.PISOutr(
+                    E.CST(),
+                    E.vBC('0.00'),
+                    E.pPIS('0.00'),
+                    E.vPIS('0.00'),
+                ),
+            ),
+            E.COFINS(
+                E.COFINSOutr(
+                    E.CST(),
+                    E.vBC('0.00'),
+                    E.pCOFINS('0.00'),
+                    E.vCOFINS('0.00'),
+                ),
+            ),
+        ),
+    )
+    icms_tot = E.ICMSTot(
+        E.vBC('0.00'),
+        E.vICMS('0.00'),
+        E.vICMSDeson('0.00'),
+        E.vFCPUFDest('0.00'),
+        E.vICMSUFDest('0.00'),
+        E.vICMSUFRemet('0.00'),
+        E.vFCP('0.00'),
+        E.vBCST('0.00'),
+        E.vST('0.00'),
+        E.vFCPST('0.00'),
+        E.vFCPSTRet('0.00'),
+        E.vProd('0.00'),
+        E.vFrete('0.00'),
+        E.vSeg('0.00'),
+        E.vDesc('0.00'),
+        E.vII('0.00'),
+        E.vIPI('0.00'),
+        E.vIPIDevol('0.00'),
+        E.vPIS('0.00'),
+        E.vCOFINS('0.00'),
+        E.vOutro('0.00'),
+        E.vNF('0.00'),
+    )
+    transp = E.transp(E.modFrete('9'))  # Sem frete
+    return ide, det, icms_tot, transp
+
+
+@lru_cache(maxsize=8)
+def _get_fernet(secret_key: str):
+    """Fernet da chave do servico. A chave (SHA-256 da secret_key) e o
+    objeto sao montados uma vez por secret_key, e nao a cada NFeService,
+    que e criado por requisicao."""
+    from cryptography.fernet import Fernet
+
+    key = base64.urlsafe_b64encode(hashlib.sha256(secret_key.encode()).digest())
+    return Fernet(key)
+
+
+def _load_pkcs12(cert_data: bytes, password: Optional[bytes]) -> Tuple[Any, Any]:
+    """Retorna (private_key, certificate) do .pfx, do cache quando possivel"""
+    # Digest interno (nao vai para a SEFAZ): BLAKE2b e mais rapido que SHA-256
+    cache_key = hashlib.blake2b(cert_data + b'\0' + (password or b''), digest_size=16).digest()
+    with _CERT_CACHE_LOCK:
+        cached = _CERT_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    from cryptography.hazmat.primitives.serialization import pkcs12
+
+    # Sem default_backend(): o argumento e ignorado desde o cryptography 3.1
+    private_key, certificate, chain = pkcs12.load_key_and_certificates(
+        cert_data, password
+    )
+    with _CERT_CACHE_LOCK:
+        _CERT_CACHE[cache_key] = (private_key, certificate)
+    return private_key, certificate
+
+
+def sign_nfe_inline(root, private_key, certificate):
+    """
+    Assina o XML (NF-e ou evento) com assinatura enveloped, em uma passada.
+
+    O elemento assinado (infNFe, ou infEvento nos eventos) e canonicalizado
+    pelo proprio lxml (C14N), o digest e a assinatura saem direto do
+    cryptography e o <Signature> e montado a mao como irmao do elemento,
+    sem o parse/serializacao extra do signxml.
+
+    Args:
+        root: Arvore lxml do documento
+        private_key: Chave privada do certificado A1
+        certificate: Certificado A1
+
+    Returns:
+        A propria arvore, com o <Signature> incluido
+    """
+    from lxml import etree
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+    from cryptography.hazmat.primitives.serialization import Encoding
+
+    inf = root.find(_FIND_INFNFE)
+    if inf is None:
+        inf = root.find(_FIND_INFEVENTO)
+    if inf is None:
+        raise ValueError("Elemento infNFe nao encontrado no XML")
+
+    # Digest do elemento referenciado (o transform enveloped nao altera nada:
+    # a assinatura fica fora dele)
+    digest = hashlib.sha1(etree.tostring(inf, method='c14n')).digest()
+
+    ds = _DS
+    signature = etree.SubElement(inf.getparent(), ds['Signature'], nsmap={None: _DSIG_NS})
+    signed_info = etree.SubElement(signature, ds['SignedInfo'])
+    etree.SubElement(signed_info, ds['CanonicalizationMethod'], Algorithm=_C14N_ALG)
+    etree.SubElement(signed_info, ds['SignatureMethod'], Algorithm=_DSIG_NS + 'rsa-sha1')
+    reference = etree.SubElement(signed_info, ds['Reference'], URI='#' + inf.get('Id'))
+    transforms = etree.SubElement(reference, ds['Transforms'])
+    etree.SubElement(transforms, ds['Transform'], Algorithm=_DSIG_NS + 'enveloped-signature')
+    etree.SubElement(transforms, ds['Transform'], Algorithm=_C14N_ALG)
+    etree.SubElement(reference, ds['DigestMethod'], Algorithm=_DSIG_NS + 'sha1')
+    etree.SubElement(reference, ds['DigestValue']).text = base64.b64encode(digest).decode()
+
+    # SignedInfo canonicalizado ja no lugar final (herda o xmlns do Signature)
+    signed_info_c14n = etree.tostring(signed_info, method='c14n')
+    signature_value = private_key.sign(signed_info_c14n, padding.PKCS1v15(), hashes.SHA1())
+    etree.SubElement(signature, ds['SignatureValue']).text = base64.b64encode(signature_value).decode()
+
+    key_info = etree.SubElement(signature, ds['KeyInfo'])
+    x509_data = etree.SubElement(key_info, ds['X509Data'])
+    etree.SubElement(x509_data, ds['X509Certificate']).text = base64.b64encode(
+        certificate.public_bytes(Encoding.DER)
+    ).decode()
+
+    return root
+
+
+class NFeItem(msgspec.Struct):
+    """
+    Item da NF-e (det/prod + impostos do Simples Nacional).
+    Campos tipados com os defaults do leiaute: o builder le atributos em vez
+    de ~25 dict.get por item. None = "mesmo valor do campo comercial"
+    (uTrib/qTrib/vUnTrib) ou "numero do item" (cProd).
+    """
+    cProd: Optional[str] = None
+    cEAN: str = 'SEM GTIN'
+    xProd: str = 'PRODUTO'
+    NCM: str = '00000000'
+    CFOP: str = '5102'
+    uCom: str = 'UN'
+    qCom: float = 1.0
+    vUnCom: float = 0.0
+    vProd: float = 0.0
+    cEANTrib: str = 'SEM GTIN'
+    uTrib: Optional[str] = None
+    qTrib: Optional[float] = None
+    vUnTrib: Optional[float] = None
+    orig: str = '0'
+    CSOSN: str = '102'
+    CST_PIS: str = '99'
+    CST_COFINS: str = '99'
+
+
 class NFeService:
     """Servico para emissao e gerenciamento de NF-e"""
 
@@ -166,15 +510,16 @@ class NFeService:
         Args:
             secret_key: Chave secreta para descriptografar senha do certificado
         """
-        self.secret_key = secret_key
+        # So o Fernet derivado fica na instancia, nao a secret_key em texto
+        self._fernet = _get_fernet(secret_key)
         self._certificate = None
         self._private_key = None
 
     def _decrypt_password(self, encrypted_password: str) -> str:
         """Descriptografa a senha do certificado"""
-        key = base64.urlsafe_b64encode(hashlib.sha256(self.secret_key.encode()).digest())
-        fernet = Fernet(key)
-        return fernet.decrypt(encrypted_password.encode()).decode()
+        # Sem cache: a senha em claro nao fica guardada no processo; o
+        # decrypt custa microssegundos e o PKCS12 ja vem do _CERT_CACHE
+        return self._fernet.decrypt(encrypted_password.encode()).decode()
 
     def load_certificate(self, cert_data: bytes, encrypted_password: str) -> Tuple[Any, Any]:
         """
@@ -188,9 +533,7 @@ class NFeService:
             Tupla (private_key, certificate)
         """
         password = self._decrypt_password(encrypted_password)
-        private_key, certificate, chain = pkcs12.load_key_and_certificates(
-            cert_data, password.encode(), default_backend()
-        )
+        private_key, certificate = _load_pkcs12(cert_data, password.encode())
         self._private_key = private_key
         self._certificate = certificate
         return private_key, certificate
@@ -212,13 +555,10 @@ class NFeService:
             # TODO: Adicionar URLs de producao
             raise NotImplementedError("URLs de producao ainda nao implementadas")
 
-        # Verifica se UF usa SVRS
-        if uf in UF_SVRS:
-            urls = SEFAZ_URLS_HOMOLOGACAO.get('SVRS', {})
-        else:
-            urls = SEFAZ_URLS_HOMOLOGACAO.get(uf, SEFAZ_URLS_HOMOLOGACAO.get('SVRS', {}))
-
-        return urls.get(servico, '')
+        url = _URL_INDEX.get((uf, servico, ambiente))
+        if url is None:
+            url = _URL_INDEX.get(('SVRS', servico, ambiente), '')
+        return url
 
     def gerar_chave_acesso(
         self,
@@ -250,37 +590,36 @@ class NFeService:
             Chave de acesso com 44 digitos
         """
         cuf = CODIGO_UF.get(uf, '35')  # Default SP
-        aamm = data_emissao.strftime('%y%m')
-        cnpj_limpo = cnpj.replace('.', '').replace('/', '').replace('-', '').zfill(14)
-        mod = str(modelo).zfill(2)
-        ser = str(serie).zfill(3)
-        nnf = str(numero).zfill(9)
-        tpemis = str(tipo_emissao)
+        cnpj_limpo = cnpj.translate(_DOC_TRANS).zfill(14)
 
         if codigo_numerico is None:
-            import random
-            codigo_numerico = str(random.randint(10000000, 99999999))
-
-        cnf = codigo_numerico.zfill(8)
+            # cNF imprevisivel (8 digitos, 10000000..99999999)
+            cnf = f"{secrets.randbelow(90_000_000) + 10_000_000:08d}"
+        else:
+            cnf = codigo_numerico.zfill(8)
 
-        # Chave sem digito verificador
-        chave_sem_dv = f"{cuf}{aamm}{cnpj_limpo}{mod}{ser}{nnf}{tpemis}{cnf}"
+        # Chave sem digito verificador; AAMM, mod, serie e nNF com o
+        # preenchimento de zeros feito pelo proprio format
+        chave_sem_dv = (
+            f"{cuf}{data_emissao.year % 100:02d}{data_emissao.month:02d}"
+            f"{cnpj_limpo}{modelo:02d}{serie:03d}{numero:09d}{tipo_emissao}{cnf}"
+        )
 
         # Calcula digito verificador (modulo 11)
-        dv = self._calcular_dv_mod11(chave_sem_dv)
+        dv = self._calcular_dv_mod11(chave_sem_dv.encode('ascii'))
 
         return f"{chave_sem_dv}{dv}"
 
-    def _calcular_dv_mod11(self, chave: str) -> str:
-        """Calcula digito verificador modulo 11"""
-        peso = 2
-        soma = 0
+    def _calcular_dv_mod11(self, chave) -> str:
+        """Calcula digito verificador modulo 11 (chave em str ou bytes ASCII)"""
+        if isinstance(chave, str):
+            chave = chave.encode('ascii')
+        if not chave.isdigit():
+            raise ValueError(f"Chave com caracteres nao numericos: {chave!r}")
 
-        for digito in reversed(chave):
-            soma += int(digito) * peso
-            peso += 1
-            if peso > 9:
-                peso = 2
+        # Pesos 2..9 ciclicos a partir do ultimo digito, direto sobre os
+        # codigos ASCII: sum((b - 48) * p) = sum(b * p) - 48 * sum(p)
+        soma = sum(map(mul, chave[::-1], _DV_PESOS)) - 48 * _DV_PESOS_ACUM[len(chave)]
 
         resto = soma % 11
         dv = 11 - resto
@@ -304,233 +643,222 @@ class NFeService:
             dados_nfe: Dados gerais da NF-e (numero, serie, data, etc)
             dados_emitente: Dados do emitente (empresa)
             dados_destinatario: Dados do destinatario (cliente)
-            itens: Lista de itens da nota
+            itens: Itens da nota (NFeItem, ou dicts com as mesmas chaves)
             chave_acesso: Chave de acesso gerada
 
         Returns:
             XML da NF-e como string
         """
-        # Cria elemento raiz
-        nfe = etree.Element('{%s}NFe' % NFE_NAMESPACE, nsmap=NSMAP)
-
-        # infNFe - Informacoes da NF-e
-        infNFe = etree.SubElement(nfe, '{%s}infNFe' % NFE_NAMESPACE)
-        infNFe.set('versao', '4.00')
-        infNFe.set('Id', f'NFe{chave_acesso}')
-
-        # ide - Identificacao da NF-e
-        ide = etree.SubElement(infNFe, '{%s}ide' % NFE_NAMESPACE)
-        etree.SubElement(ide, '{%s}cUF' % NFE_NAMESPACE).text = dados_nfe['cUF']
-        etree.SubElement(ide, '{%s}cNF' % NFE_NAMESPACE).text = dados_nfe['cNF']
-        etree.SubElement(ide, '{%s}natOp' % NFE_NAMESPACE).text = dados_nfe.get('natOp', 'VENDA')
-        etree.SubElement(ide, '{%s}mod' % NFE_NAMESPACE).text = str(dados_nfe.get('mod', 55))
-        etree.SubElement(ide, '{%s}serie' % NFE_NAMESPACE).text = str(dados_nfe['serie'])
-        etree.SubElement(ide, '{%s}nNF' % NFE_NAMESPACE).text = str(dados_nfe['nNF'])
-        etree.SubElement(ide, '{%s}dhEmi' % NFE_NAMESPACE).text = dados_nfe['dhEmi']
-        etree.SubElement(ide, '{%s}tpNF' % NFE_NAMESPACE).text = '1'  # 1=Saida
-        etree.SubElement(ide, '{%s}idDest' % NFE_NAMESPACE).text = dados_nfe.get('idDest', '1')
-        etree.SubElement(ide, '{%s}cMunFG' % NFE_NAMESPACE).text = dados_nfe['cMunFG']
-        etree.SubElement(ide, '{%s}tpImp' % NFE_NAMESPACE).text = '1'  # DANFE retrato
-        etree.SubElement(ide, '{%s}tpEmis' % NFE_NAMESPACE).text = str(dados_nfe.get('tpEmis', 1))
-        etree.SubElement(ide, '{%s}cDV' % NFE_NAMESPACE).text = chave_acesso[-1]
-        etree.SubElement(ide, '{%s}tpAmb' % NFE_NAMESPACE).text = str(dados_nfe['tpAmb'])
-        etree.SubElement(ide, '{%s}finNFe' % NFE_NAMESPACE).text = '1'  # NF-e normal
-        etree.SubElement(ide, '{%s}indFinal' % NFE_NAMESPACE).text = '1'  # Consumidor final
-        etree.SubElement(ide, '{%s}indPres' % NFE_NAMESPACE).text = '1'  # Presencial
-        etree.SubElement(ide, '{%s}procEmi' % NFE_NAMESPACE).text = '0'  # Emissao propria
-        etree.SubElement(ide, '{%s}verProc' % NFE_NAMESPACE).text = 'Enterprise System 1.0'
+        from lxml import etree
 
-        # emit - Emitente
-        emit = etree.SubElement(infNFe, '{%s}emit' % NFE_NAMESPACE)
-        etree.SubElement(emit, '{%s}CNPJ' % NFE_NAMESPACE).text = dados_emitente['CNPJ']
-        etree.SubElement(emit, '{%s}xNome' % NFE_NAMESPACE).text = dados_emitente['xNome'][:60]
+        nfe = self.gerar_nfe_element(
+            dados_nfe, dados_emitente, dados_destinatario, itens, chave_acesso
+        )
 
-        if dados_emitente.get('xFant'):
-            etree.SubElement(emit, '{%s}xFant' % NFE_NAMESPACE).text = dados_emitente['xFant'][:60]
+        # Compacto: a SEFAZ nao quer espacos entre elementos, e a indentacao
+        # entraria no C14N do infNFe assinado
+        return etree.tostring(nfe, encoding='unicode')
 
-        # Endereco do emitente
-        enderEmit = etree.SubElement(emit, '{%s}enderEmit' % NFE_NAMESPACE)
-        etree.SubElement(enderEmit, '{%s}xLgr' % NFE_NAMESPACE).text = dados_emitente.get('xLgr', '')[:60]
-        etree.SubElement(enderEmit, '{%s}nro' % NFE_NAMESPACE).text = dados_emitente.get('nro', 'S/N')[:60]
-        if dados_emitente.get('xCpl'):
-            etree.SubElement(enderEmit, '{%s}xCpl' % NFE_NAMESPACE).text = dados_emitente['xCpl'][:60]
-        etree.SubElement(enderEmit, '{%s}xBairro' % NFE_NAMESPACE).text = dados_emitente.get('xBairro', '')[:60]
-        etree.SubElement(enderEmit, '{%s}cMun' % NFE_NAMESPACE).text = dados_emitente.get('cMun', '')
-        etree.SubElement(enderEmit, '{%s}xMun' % NFE_NAMESPACE).text = dados_emitente.get('xMun', '')[:60]
-        etree.SubElement(enderEmit, '{%s}UF' % NFE_NAMESPACE).text = dados_emitente.get('UF', '')
-        etree.SubElement(enderEmit, '{%s}CEP' % NFE_NAMESPACE).text = dados_emitente.get('CEP', '').replace('-', '')
-        etree.SubElement(enderEmit, '{%s}cPais' % NFE_NAMESPACE).text = '1058'  # Brasil
-        etree.SubElement(enderEmit, '{%s}xPais' % NFE_NAMESPACE).text = 'BRASIL'
+    def gerar_nfe_element(
+        self,
+        dados_nfe: Dict[str, Any],
+        dados_emitente: Dict[str, Any],
+        dados_destinatario: Dict[str, Any],
+        itens: list,
+        chave_acesso: str
+    ):
+        """
+        Mesmo XML de gerar_xml_nfe, como elemento lxml (raiz NFe).
+        Para assinar direto com assinar_xml, sem serializar e reler.
+        """
+        E = _nfe_maker()
 
+        # emit - Emitente
+        enderEmit = E.enderEmit(
+            E.xLgr(_s(dados_emitente, 'xLgr', 60)),
+            E.nro(_s(dados_emitente, 'nro', 60, 'S/N')),
+        )
+        if dados_emitente.get('xCpl'):
+            enderEmit.append(E.xCpl(dados_emitente['xCpl'][:60]))
+        for child in (
+            E.xBairro(_s(dados_emitente, 'xBairro', 60)),
+            E.cMun(dados_emitente.get('cMun', '')),
+            E.xMun(_s(dados_emitente, 'xMun', 60)),
+            E.UF(dados_emitente.get('UF', '')),
+            E.CEP(dados_emitente.get('CEP', '').translate(_DOC_TRANS)),
+            E.cPais('1058'),  # Brasil
+            E.xPais('BRASIL'),
+        ):
+            enderEmit.append(child)
         if dados_emitente.get('fone'):
-            etree.SubElement(enderEmit, '{%s}fone' % NFE_NAMESPACE).text = dados_emitente['fone'].replace('(', '').replace(')', '').replace('-', '').replace(' ', '')
+            enderEmit.append(E.fone(dados_emitente['fone'].translate(_FONE_TRANS)))
 
-        etree.SubElement(emit, '{%s}IE' % NFE_NAMESPACE).text = dados_emitente.get('IE', 'ISENTO')
-        etree.SubElement(emit, '{%s}CRT' % NFE_NAMESPACE).text = str(dados_emitente.get('CRT', 1))  # Simples Nacional
+        emit = E.emit(
+            E.CNPJ(dados_emitente['CNPJ']),
+            E.xNome(dados_emitente['xNome'][:60]),
+        )
+        if dados_emitente.get('xFant'):
+            emit.append(E.xFant(dados_emitente['xFant'][:60]))
+        emit.append(enderEmit)
+        emit.append(E.IE(dados_emitente.get('IE', 'ISENTO')))
+        emit.append(E.CRT(str(dados_emitente.get('CRT', 1))))  # Simples Nacional
 
         # dest - Destinatario
-        dest = etree.SubElement(infNFe, '{%s}dest' % NFE_NAMESPACE)
+        dest = E.dest()
 
         cpf_cnpj = dados_destinatario.get('CPF') or dados_destinatario.get('CNPJ', '')
-        cpf_cnpj_limpo = cpf_cnpj.replace('.', '').replace('/', '').replace('-', '')
+        cpf_cnpj_limpo = cpf_cnpj.translate(_DOC_TRANS)
 
         if len(cpf_cnpj_limpo) == 11:
-            etree.SubElement(dest, '{%s}CPF' % NFE_NAMESPACE).text = cpf_cnpj_limpo
+            dest.append(E.CPF(cpf_cnpj_limpo))
         elif len(cpf_cnpj_limpo) == 14:
-            etree.SubElement(dest, '{%s}CNPJ' % NFE_NAMESPACE).text = cpf_cnpj_limpo
+            dest.append(E.CNPJ(cpf_cnpj_limpo))
 
-        etree.SubElement(dest, '{%s}xNome' % NFE_NAMESPACE).text = dados_destinatario.get('xNome', 'CONSUMIDOR')[:60]
+        dest.append(E.xNome(_s(dados_destinatario, 'xNome', 60, 'CONSUMIDOR')))
 
         # Endereco do destinatario
         if dados_destinatario.get('xLgr'):
-            enderDest = etree.SubElement(dest, '{%s}enderDest' % NFE_NAMESPACE)
-            etree.SubElement(enderDest, '{%s}xLgr' % NFE_NAMESPACE).text = dados_destinatario.get('xLgr', '')[:60]
-            etree.SubElement(enderDest, '{%s}nro' % NFE_NAMESPACE).text = dados_destinatario.get('nro', 'S/N')[:60]
+            enderDest = E.enderDest(
+                E.xLgr(_s(dados_destinatario, 'xLgr', 60)),
+                E.nro(_s(dados_destinatario, 'nro', 60, 'S/N')),
+            )
             if dados_destinatario.get('xCpl'):
-                etree.SubElement(enderDest, '{%s}xCpl' % NFE_NAMESPACE).text = dados_destinatario['xCpl'][:60]
-            etree.SubElement(enderDest, '{%s}xBairro' % NFE_NAMESPACE).text = dados_destinatario.get('xBairro', '')[:60]
-            etree.SubElement(enderDest, '{%s}cMun' % NFE_NAMESPACE).text = dados_destinatario.get('cMun', '')
-            etree.SubElement(enderDest, '{%s}xMun' % NFE_NAMESPACE).text = dados_destinatario.get('xMun', '')[:60]
-            etree.SubElement(enderDest, '{%s}UF' % NFE_NAMESPACE).text = dados_destinatario.get('UF', '')
-            etree.SubElement(enderDest, '{%s}CEP' % NFE_NAMESPACE).text = dados_destinatario.get('CEP', '').replace('-', '')
-            etree.SubElement(enderDest, '{%s}cPais' % NFE_NAMESPACE).text = '1058'
-            etree.SubElement(enderDest, '{%s}xPais' % NFE_NAMESPACE).text = 'BRASIL'
-
-        etree.SubElement(dest, '{%s}indIEDest' % NFE_NAMESPACE).text = '9'  # Nao contribuinte
+                enderDest.append(E.xCpl(dados_destinatario['xCpl'][:60]))
+            for child in (
+                E.xBairro(_s(dados_destinatario, 'xBairro', 60)),
+                E.cMun(dados_destinatario.get('cMun', '')),
+                E.xMun(_s(dados_destinatario, 'xMun', 60)),
+                E.UF(dados_destinatario.get('UF', '')),
+                E.CEP(dados_destinatario.get('CEP', '').translate(_DOC_TRANS)),
+                E.cPais('1058'),
+                E.xPais('BRASIL'),
+            ):
+                enderDest.append(child)
+            dest.append(enderDest)
+
+        dest.append(E.indIEDest('9'))  # Nao contribuinte
+
+        # ide - Identificacao da NF-e: copia do bloco fixo com os campos da nota
+        ide_modelo, det_modelo, icms_tot_modelo, transp_modelo = _blocos_fixos()
+        ide = deepcopy(ide_modelo)
+        for pos, texto in zip(_IDE_VARIAVEIS, (
+            dados_nfe['cUF'],
+            dados_nfe['cNF'],
+            dados_nfe.get('natOp', 'VENDA'),
+            str(dados_nfe.get('mod', 55)),
+            str(dados_nfe['serie']),
+            str(dados_nfe['nNF']),
+            dados_nfe['dhEmi'],
+            dados_nfe.get('idDest', '1'),
+            dados_nfe['cMunFG'],
+            str(dados_nfe.get('tpEmis', 1)),
+            chave_acesso[-1],
+            str(dados_nfe['tpAmb']),
+        )):
+            ide[pos].text = texto
+
+        infNFe = E.infNFe(
+            {'versao': '4.00', 'Id': f'NFe{chave_acesso}'},
+            ide,
+            emit,
+            dest,
+        )
 
         # det - Detalhes dos produtos
+        # Itens em dict (chamadas antigas) sao convertidos de uma vez
+        if itens and not isinstance(itens[0], NFeItem):
+            itens = msgspec.convert(itens, List[NFeItem], strict=False)
+
+        # Cada item e uma copia do det fixo; so textos e nItem mudam
         for i, item in enumerate(itens, start=1):
-            det = etree.SubElement(infNFe, '{%s}det' % NFE_NAMESPACE)
+            det = deepcopy(det_modelo)
             det.set('nItem', str(i))
-
-            # Produto
-            prod = etree.SubElement(det, '{%s}prod' % NFE_NAMESPACE)
-            etree.SubElement(prod, '{%s}cProd' % NFE_NAMESPACE).text = item.get('cProd', str(i))[:60]
-            etree.SubElement(prod, '{%s}cEAN' % NFE_NAMESPACE).text = item.get('cEAN', 'SEM GTIN')
-            etree.SubElement(prod, '{%s}xProd' % NFE_NAMESPACE).text = item.get('xProd', 'PRODUTO')[:120]
-            etree.SubElement(prod, '{%s}NCM' % NFE_NAMESPACE).text = item.get('NCM', '00000000')
-            etree.SubElement(prod, '{%s}CFOP' % NFE_NAMESPACE).text = item.get('CFOP', '5102')
-            etree.SubElement(prod, '{%s}uCom' % NFE_NAMESPACE).text = item.get('uCom', 'UN')[:6]
-            etree.SubElement(prod, '{%s}qCom' % NFE_NAMESPACE).text = f"{float(item.get('qCom', 1)):.4f}"
-            etree.SubElement(prod, '{%s}vUnCom' % NFE_NAMESPACE).text = f"{float(item.get('vUnCom', 0)):.10f}"
-            etree.SubElement(prod, '{%s}vProd' % NFE_NAMESPACE).text = f"{float(item.get('vProd', 0)):.2f}"
-            etree.SubElement(prod, '{%s}cEANTrib' % NFE_NAMESPACE).text = item.get('cEANTrib', 'SEM GTIN')
-            etree.SubElement(prod, '{%s}uTrib' % NFE_NAMESPACE).text = item.get('uTrib', item.get('uCom', 'UN'))[:6]
-            etree.SubElement(prod, '{%s}qTrib' % NFE_NAMESPACE).text = f"{float(item.get('qTrib', item.get('qCom', 1))):.4f}"
-            etree.SubElement(prod, '{%s}vUnTrib' % NFE_NAMESPACE).text = f"{float(item.get('vUnTrib', item.get('vUnCom', 0))):.10f}"
-            etree.SubElement(prod, '{%s}indTot' % NFE_NAMESPACE).text = '1'  # Compoe total
-
+            prod, imposto = det
+            # Produto (indTot, o 14o campo, ja vem do modelo)
+            for campo, texto in zip(prod, (
+                (item.cProd if item.cProd is not None else str(i))[:60],
+                item.cEAN,
+                item.xProd[:120],
+                item.NCM,
+                item.CFOP,
+                item.uCom[:6],
+                f"{item.qCom:.4f}",
+                f"{item.vUnCom:.10f}",
+                f"{item.vProd:.2f}",
+                item.cEANTrib,
+                (item.uTrib if item.uTrib is not None else item.uCom)[:6],
+                f"{item.qTrib if item.qTrib is not None else item.qCom:.4f}",
+                f"{item.vUnTrib if item.vUnTrib is not None else item.vUnCom:.10f}",
+            )):
+                campo.text = texto
             # Imposto
-            imposto = etree.SubElement(det, '{%s}imposto' % NFE_NAMESPACE)
-
-            # ICMS
-            icms = etree.SubElement(imposto, '{%s}ICMS' % NFE_NAMESPACE)
-            icms_sn = etree.SubElement(icms, '{%s}ICMSSN102' % NFE_NAMESPACE)  # Simples Nacional
-            etree.SubElement(icms_sn, '{%s}orig' % NFE_NAMESPACE).text = item.get('orig', '0')
-            etree.SubElement(icms_sn, '{%s}CSOSN' % NFE_NAMESPACE).text = item.get('CSOSN', '102')
-
-            # PIS
-            pis = etree.SubElement(imposto, '{%s}PIS' % NFE_NAMESPACE)
-            pis_nt = etree.SubElement(pis, '{%s}PISOutr' % NFE_NAMESPACE)
-            etree.SubElement(pis_nt, '{%s}CST' % NFE_NAMESPACE).text = item.get('CST_PIS', '99')
-            etree.SubElement(pis_nt, '{%s}vBC' % NFE_NAMESPACE).text = '0.00'
-            etree.SubElement(pis_nt, '{%s}pPIS' % NFE_NAMESPACE).text = '0.00'
-            etree.SubElement(pis_nt, '{%s}vPIS' % NFE_NAMESPACE).text = '0.00'
-
-            # COFINS
-            cofins = etree.SubElement(imposto, '{%s}COFINS' % NFE_NAMESPACE)
-            cofins_nt = etree.SubElement(cofins, '{%s}COFINSOutr' % NFE_NAMESPACE)
-            etree.SubElement(cofins_nt, '{%s}CST' % NFE_NAMESPACE).text = item.get('CST_COFINS', '99')
-            etree.SubElement(cofins_nt, '{%s}vBC' % NFE_NAMESPACE).text = '0.00'
-            etree.SubElement(cofins_nt, '{%s}pCOFINS' % NFE_NAMESPACE).text = '0.00'
-            etree.SubElement(cofins_nt, '{%s}vCOFINS' % NFE_NAMESPACE).text = '0.00'
-
-        # total - Totais da NF-e
-        total = etree.SubElement(infNFe, '{%s}total' % NFE_NAMESPACE)
-        icms_tot = etree.SubElement(total, '{%s}ICMSTot' % NFE_NAMESPACE)
-        etree.SubElement(icms_tot, '{%s}vBC' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vICMS' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vICMSDeson' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vFCPUFDest' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vICMSUFDest' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vICMSUFRemet' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vFCP' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vBCST' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vST' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vFCPST' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vFCPSTRet' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vProd' % NFE_NAMESPACE).text = f"{float(dados_nfe.get('vProd', 0)):.2f}"
-        etree.SubElement(icms_tot, '{%s}vFrete' % NFE_NAMESPACE).text = f"{float(dados_nfe.get('vFrete', 0)):.2f}"
-        etree.SubElement(icms_tot, '{%s}vSeg' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vDesc' % NFE_NAMESPACE).text = f"{float(dados_nfe.get('vDesc', 0)):.2f}"
-        etree.SubElement(icms_tot, '{%s}vII' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vIPI' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vIPIDevol' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vPIS' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vCOFINS' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vOutro' % NFE_NAMESPACE).text = '0.00'
-        etree.SubElement(icms_tot, '{%s}vNF' % NFE_NAMESPACE).text = f"{float(dados_nfe.get('vNF', 0)):.2f}"
+            icms_sn = imposto[0][0]
+            icms_sn[0].text = item.orig
+            icms_sn[1].text = item.CSOSN
+            imposto[1][0][0].text = item.CST_PIS
+            imposto[2][0][0].text = item.CST_COFINS
+            infNFe.append(det)
+
+        # total - Totais da NF-e: copia do bloco fixo, so os valores mudam
+        icms_tot = deepcopy(icms_tot_modelo)
+        icms_tot[_ICMSTOT_VPROD].text = f"{float(dados_nfe.get('vProd', 0)):.2f}"
+        icms_tot[_ICMSTOT_VFRETE].text = f"{float(dados_nfe.get('vFrete', 0)):.2f}"
+        icms_tot[_ICMSTOT_VDESC].text = f"{float(dados_nfe.get('vDesc', 0)):.2f}"
+        icms_tot[_ICMSTOT_VNF].text = f"{float(dados_nfe.get('vNF', 0)):.2f}"
+        infNFe.append(E.total(icms_tot))
 
         # transp - Transporte
-        transp = etree.SubElement(infNFe, '{%s}transp' % NFE_NAMESPACE)
-        etree.SubElement(transp, '{%s}modFrete' % NFE_NAMESPACE).text = '9'  # Sem frete
+        infNFe.append(deepcopy(transp_modelo))
 
         # pag - Pagamento
-        pag = etree.SubElement(infNFe, '{%s}pag' % NFE_NAMESPACE)
-        det_pag = etree.SubElement(pag, '{%s}detPag' % NFE_NAMESPACE)
-        etree.SubElement(det_pag, '{%s}tPag' % NFE_NAMESPACE).text = dados_nfe.get('tPag', '01')  # Dinheiro
-        etree.SubElement(det_pag, '{%s}vPag' % NFE_NAMESPACE).text = f"{float(dados_nfe.get('vNF', 0)):.2f}"
+        infNFe.append(E.pag(
+            E.detPag(
+                E.tPag(dados_nfe.get('tPag', '01')),  # Dinheiro
+                E.vPag(f"{float(dados_nfe.get('vNF', 0)):.2f}"),
+            ),
+        ))
 
         # infAdic - Informacoes adicionais
         if dados_nfe.get('infCpl'):
-            inf_adic = etree.SubElement(infNFe, '{%s}infAdic' % NFE_NAMESPACE)
-            etree.SubElement(inf_adic, '{%s}infCpl' % NFE_NAMESPACE).text = dados_nfe['infCpl'][:5000]
+            infNFe.append(E.infAdic(E.infCpl(dados_nfe['infCpl'][:5000])))
 
-        return etree.tostring(nfe, encoding='unicode', pretty_print=True)
+        return E.NFe(infNFe)
 
-    def assinar_xml(self, xml_str: str) -> str:
+    def assinar_xml(self, xml_str) -> str:
         """
         Assina digitalmente o XML da NF-e.
 
         Args:
-            xml_str: XML da NF-e como string
+            xml_str: XML da NF-e como string, ou o elemento lxml de
+                gerar_nfe_element (assinado no lugar, sem novo parse)
 
         Returns:
             XML assinado como string
         """
+        from lxml import etree
+
         if not self._private_key or not self._certificate:
             raise ValueError("Certificado digital nao carregado")
 
-        # Parse XML
-        xml_doc = etree.fromstring(xml_str.encode('utf-8'))
-
-        # Encontra elemento a ser assinado (infNFe)
-        infNFe = xml_doc.find('.//{%s}infNFe' % NFE_NAMESPACE)
-        if infNFe is None:
-            raise ValueError("Elemento infNFe nao encontrado no XML")
-
-        # Configura assinatura
-        signer = XMLSigner(
-            method=SignatureMethod.RSA_SHA1,
-            digest_algorithm=DigestAlgorithm.SHA1,
-            c14n_algorithm='http://www.w3.org/TR/2001/REC-xml-c14n-20010315',
-            signature_algorithm='http://www.w3.org/2000/09/xmldsig#rsa-sha1'
-        )
+        if isinstance(xml_str, str):
+            xml_doc = etree.fromstring(xml_str.encode('utf-8'))
+        else:
+            xml_doc = xml_str
 
-        # Assina
-        signed_xml = signer.sign(
-            xml_doc,
-            key=self._private_key,
-            cert=self._certificate,
-            reference_uri=f"#{infNFe.get('Id')}"
-        )
+        signed_xml = sign_nfe_inline(xml_doc, self._private_key, self._certificate)
 
-        return etree.tostring(signed_xml, encoding='unicode', pretty_print=True)
+        # Sem pretty_print: reindentar depois de assinar mudaria o SignedInfo
+        # ja assinado
+        return etree.tostring(signed_xml, encoding='unicode')
 
     async def consultar_status_servico(self, uf: str, ambiente: int = 2) -> Dict[str, Any]:
         """
         Consulta status do servico SEFAZ.
 
+        O status OK fica em cache por STATUS_CACHE_TTL segundos por
+        (UF, ambiente), compartilhado entre instancias. Consultas
+        simultaneas da mesma chave esperam a primeira (uma so ida a SEFAZ).
+
         Args:
             uf: Sigla do estado
             ambiente: 1=Producao, 2=Homologacao
@@ -538,6 +866,56 @@ class NFeService:
         Returns:
             Dicionario com status do servico
         """
+        key = (uf, ambiente)
+        cached = _status_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < STATUS_CACHE_TTL:
+            return dict(cached[1])
+
+        lock = _status_locks.get(key)
+        if lock is None:
+            lock = _status_locks[key] = asyncio.Lock()
+
+        async with lock:
+            # Outra consulta pode ter preenchido o cache enquanto esperavamos
+            cached = _status_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < STATUS_CACHE_TTL:
+                return dict(cached[1])
+
+            result = await self._consultar_status_servico(uf, ambiente)
+            if result.get('status') == 'OK':
+                _status_cache[key] = (time.monotonic(), result)
+            return dict(result)
+
+    async def consultar_status_servico_bulk(
+        self,
+        ufs: List[str],
+        ambiente: int = 2,
+        concurrency: int = 8
+    ) -> Dict[str, Any]:
+        """
+        Consulta o status de varias UFs em paralelo.
+
+        Args:
+            ufs: Siglas dos estados
+            ambiente: 1=Producao, 2=Homologacao
+            concurrency: Maximo de consultas simultaneas
+
+        Returns:
+            Dicionario UF -> status do servico (ou a excecao da consulta)
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def consultar(uf: str) -> Dict[str, Any]:
+            async with sem:
+                return await self.consultar_status_servico(uf, ambiente)
+
+        results = await asyncio.gather(*map(consultar, ufs), return_exceptions=True)
+        return dict(zip(ufs, results))
+
+    async def _consultar_status_servico(self, uf: str, ambiente: int) -> Dict[str, Any]:
+        """Consulta o status na SEFAZ, sem cache"""
+        from lxml import etree
+
         url = self.get_sefaz_url(uf, 'NfeStatusServico', ambiente)
 
         if not url:
@@ -549,11 +927,11 @@ class NFeService:
 
         try:
             # Cria XML de consulta
-            cons_stat = etree.Element('{%s}consStatServ' % NFE_NAMESPACE, nsmap=NSMAP)
+            cons_stat = etree.Element(_Q['consStatServ'], nsmap=NSMAP)
             cons_stat.set('versao', '4.00')
-            etree.SubElement(cons_stat, '{%s}tpAmb' % NFE_NAMESPACE).text = str(ambiente)
-            etree.SubElement(cons_stat, '{%s}cUF' % NFE_NAMESPACE).text = CODIGO_UF.get(uf, '35')
-            etree.SubElement(cons_stat, '{%s}xServ' % NFE_NAMESPACE).text = 'STATUS'
+            etree.SubElement(cons_stat, _Q['tpAmb']).text = str(ambiente)
+            etree.SubElement(cons_stat, _Q['cUF']).text = CODIGO_UF.get(uf, '35')
+            etree.SubElement(cons_stat, _Q['xServ']).text = 'STATUS'
 
             xml_str = etree.tostring(cons_stat, encoding='unicode')
 
@@ -579,228 +957,313 @@ class NFeService:
 # FUNCOES AUXILIARES PARA USO NO GATEWAY
 # =====================================================
 
-async def processar_emissao_nfe(
-    conn: asyncpg.Connection,
-    nfe_id: str,
-    service: NFeService
-) -> Dict[str, Any]:
-    """
-    Processa a emissao de uma NF-e pendente.
-
-    Args:
-        conn: Conexao com banco do tenant
-        nfe_id: ID da emissao
-        service: Instancia do NFeService
-
-    Returns:
-        Resultado do processamento
-    """
-    try:
-        # Busca dados da emissao
-        nfe = await conn.fetchrow(
-            "SELECT * FROM nfe_emissions WHERE id = $1",
-            nfe_id
-        )
-
-        if not nfe:
-            return {'success': False, 'error': 'Emissao nao encontrada'}
-
-        if nfe['status'] != 'PENDING':
-            return {'success': False, 'error': f'Status invalido: {nfe["status"]}'}
-
-        # Busca configuracoes fiscais
-        fiscal = await conn.fetchrow(
-            "SELECT * FROM fiscal_settings WHERE is_active = TRUE LIMIT 1"
-        )
+# SQL da emissao em constantes de modulo: o asyncpg guarda o prepared
+# statement por texto da consulta em cada conexao, e o texto fica sempre igual.
+# Emissao, venda, cliente, configuracao fiscal e empresa vem numa so linha
+# por emissao (cliente e empresa com prefixo, pois repetem nomes de coluna);
+# os itens de todas as vendas seguem numa segunda consulta. Valores NUMERIC
+# vem como float8, que o asyncpg decodifica direto em float, sem Decimal.
+_SQL_EMISSOES = """
+    SELECT n.id, n.status, n.modelo, n.serie, n.numero_nfe,
+           s.id AS venda_id, s.subtotal::float8, s.discount_amount::float8,
+           s.shipping_amount::float8, s.total_amount::float8,
+           f.is_configured, f.uf, f.ambiente, f.codigo_municipio,
+           f.regime_tributario, f.certificate_file,
+           f.certificate_password_encrypted,
+           c.id AS cli_id, c.cpf_cnpj AS cli_cpf_cnpj,
+           c.company_name AS cli_company_name, c.trade_name AS cli_trade_name,
+           c.first_name AS cli_first_name, c.last_name AS cli_last_name,
+           c.address AS cli_address, c.address_number AS cli_address_number,
+           c.address_complement AS cli_address_complement,
+           c.neighborhood AS cli_neighborhood, c.city AS cli_city,
+           c.state AS cli_state, c.zip_code AS cli_zip_code,
+           e.existe AS emp_existe, e.document AS emp_document,
+           e.legal_name AS emp_legal_name, e.trade_name AS emp_trade_name,
+           e.street AS emp_street, e.number AS emp_number,
+           e.complement AS emp_complement, e.neighborhood AS emp_neighborhood,
+           e.city AS emp_city, e.state AS emp_state, e.zip_code AS emp_zip_code,
+           e.phone AS emp_phone, e.state_registration AS emp_state_registration
+    FROM nfe_emissions n
+    LEFT JOIN sales s ON s.id = n.sale_id
+    LEFT JOIN customers c ON c.id = s.customer_id
+    LEFT JOIN LATERAL (
+        SELECT * FROM fiscal_settings WHERE is_active = TRUE LIMIT 1
+    ) f ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT TRUE AS existe, * FROM companies LIMIT 1
+    ) e ON TRUE
+    WHERE n.id = ANY($1)
+"""
+_SQL_ITENS_VENDAS = """
+    SELECT id, sale_id, product_code, product_name, ncm_code, cfop, unit,
+           quantity::float8, unit_price::float8, total_amount::float8
+    FROM sale_items WHERE sale_id = ANY($1)
+"""
+_SQL_AUTORIZA_HOMOLOGACAO = """
+    UPDATE nfe_emissions SET
+        chave_acesso = $1,
+        xml_nfe = $2,
+        tentativas_envio = tentativas_envio + 1,
+        status = 'AUTHORIZED',
+        protocolo_autorizacao = $3,
+        data_autorizacao = CURRENT_TIMESTAMP,
+        codigo_retorno = '100',
+        motivo_retorno = 'Autorizado o uso da NF-e (HOMOLOGACAO)',
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $4
+"""
+_SQL_ERRO_EMISSAO = """
+    UPDATE nfe_emissions SET
+        status = 'ERROR',
+        ultimo_erro = $1,
+        tentativas_envio = tentativas_envio + 1,
+        xml_nfe = COALESCE($2, xml_nfe),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = $3
+"""
 
-        if not fiscal or not fiscal['is_configured']:
-            return {'success': False, 'error': 'Configuracoes fiscais nao encontradas'}
 
-        # Busca dados da venda
-        sale = await conn.fetchrow(
-            "SELECT * FROM sales WHERE id = $1",
-            nfe['sale_id']
+def _validar_emissao(nfe: Optional[asyncpg.Record]) -> Optional[str]:
+    """Retorna o motivo pelo qual a emissao nao pode ser processada, ou None"""
+    if not nfe:
+        return 'Emissao nao encontrada'
+    if nfe['status'] != 'PENDING':
+        return f'Status invalido: {nfe["status"]}'
+    if not nfe['is_configured']:
+        return 'Configuracoes fiscais nao encontradas'
+    # TODO: Enviar para SEFAZ via web service
+    # Por enquanto so homologacao (autorizacao simulada); producao e recusada
+    # antes de montar e assinar o XML
+    if nfe['ambiente'] != 2:
+        return 'Emissao em producao requer implementacao completa do web service'
+    if nfe['venda_id'] is None:
+        return 'Venda nao encontrada'
+    if not nfe['emp_existe']:
+        return 'Dados da empresa nao cadastrados'
+    return None
+
+
+def _gerar_nfe_assinada(
+    nfe: asyncpg.Record,
+    items: List[asyncpg.Record],
+    service: NFeService
+) -> Tuple[str, str]:
+    """Monta e assina o XML de uma emissao. Retorna (chave de acesso, XML)."""
+    # Carrega certificado
+    service.load_certificate(
+        nfe['certificate_file'],
+        nfe['certificate_password_encrypted']
+    )
+
+    # Gera chave de acesso
+    data_emissao = datetime.now(_UTC)
+    chave_acesso = service.gerar_chave_acesso(
+        uf=nfe['uf'],
+        data_emissao=data_emissao,
+        cnpj=nfe['emp_document'],
+        modelo=nfe['modelo'],
+        serie=nfe['serie'],
+        numero=nfe['numero_nfe'],
+        tipo_emissao=1
+    )
+
+    # Prepara dados para geracao do XML
+    dados_nfe = {
+        'cUF': CODIGO_UF.get(nfe['uf'], '35'),
+        'cNF': chave_acesso[35:43],
+        'natOp': 'VENDA DE MERCADORIA',
+        'mod': nfe['modelo'],
+        'serie': nfe['serie'],
+        'nNF': nfe['numero_nfe'],
+        'dhEmi': _data_hora_sefaz(data_emissao),
+        'tpAmb': nfe['ambiente'],
+        'cMunFG': nfe['codigo_municipio'] or '3550308',
+        'tpEmis': 1,
+        'vProd': nfe['subtotal'] or 0.0,
+        'vDesc': nfe['discount_amount'] or 0.0,
+        'vFrete': nfe['shipping_amount'] or 0.0,
+        'vNF': nfe['total_amount'] or 0.0,
+        'tPag': '01',  # Dinheiro
+    }
+
+    dados_emitente = {
+        'CNPJ': (nfe['emp_document'] or '').translate(_DOC_TRANS),
+        'xNome': nfe['emp_legal_name'] or nfe['emp_trade_name'] or '',
+        'xFant': nfe['emp_trade_name'] or '',
+        'xLgr': nfe['emp_street'] or '',
+        'nro': nfe['emp_number'] or 'S/N',
+        'xCpl': nfe['emp_complement'] or '',
+        'xBairro': nfe['emp_neighborhood'] or '',
+        'cMun': nfe['codigo_municipio'] or '3550308',
+        'xMun': nfe['emp_city'] or '',
+        'UF': nfe['emp_state'] or nfe['uf'],
+        'CEP': (nfe['emp_zip_code'] or '').translate(_DOC_TRANS),
+        'fone': nfe['emp_phone'] or '',
+        'IE': nfe['emp_state_registration'] or 'ISENTO',
+        'CRT': nfe['regime_tributario'] or 1,
+    }
+
+    dados_destinatario = {}
+    if nfe['cli_id'] is not None:
+        cpf_cnpj = (nfe['cli_cpf_cnpj'] or '').translate(_DOC_TRANS)
+        if len(cpf_cnpj) == 11:
+            dados_destinatario['CPF'] = cpf_cnpj
+        else:
+            dados_destinatario['CNPJ'] = cpf_cnpj
+
+        nome = nfe['cli_company_name'] or nfe['cli_trade_name'] or \
+               f"{nfe['cli_first_name'] or ''} {nfe['cli_last_name'] or ''}".strip() or 'CONSUMIDOR'
+        dados_destinatario['xNome'] = nome
+        dados_destinatario['xLgr'] = nfe['cli_address'] or ''
+        dados_destinatario['nro'] = nfe['cli_address_number'] or 'S/N'
+        dados_destinatario['xCpl'] = nfe['cli_address_complement'] or ''
+        dados_destinatario['xBairro'] = nfe['cli_neighborhood'] or ''
+        dados_destinatario['xMun'] = nfe['cli_city'] or ''
+        dados_destinatario['UF'] = nfe['cli_state'] or ''
+        dados_destinatario['CEP'] = (nfe['cli_zip_code'] or '').translate(_DOC_TRANS)
+
+    # Prepara itens
+    itens_nfe = [
+        NFeItem(
+            cProd=item['product_code'] or str(item['id'])[:60],
+            xProd=item['product_name'] or 'PRODUTO',
+            NCM=item['ncm_code'] or '00000000',
+            CFOP=item['cfop'] or '5102',
+            uCom=item['unit'] or 'UN',
+            qCom=item['quantity'] or 1.0,
+            vUnCom=item['unit_price'] or 0.0,
+            vProd=item['total_amount'] or 0.0,
         )
+        for item in items
+    ]
 
-        if not sale:
-            return {'success': False, 'error': 'Venda nao encontrada'}
+    # Gera XML (elemento lxml, assinado sem serializar e reler)
+    xml_nfe = service.gerar_nfe_element(
+        dados_nfe=dados_nfe,
+        dados_emitente=dados_emitente,
+        dados_destinatario=dados_destinatario,
+        itens=itens_nfe,
+        chave_acesso=chave_acesso
+    )
 
-        # Busca itens da venda
-        items = await conn.fetch(
-            "SELECT * FROM sale_items WHERE sale_id = $1",
-            sale['id']
-        )
+    # Assina XML
+    return chave_acesso, service.assinar_xml(xml_nfe)
 
-        # Busca dados do cliente
-        customer = await conn.fetchrow(
-            "SELECT * FROM customers WHERE id = $1",
-            sale['customer_id']
-        )
 
-        # Busca dados da empresa
-        company = await conn.fetchrow("SELECT * FROM companies LIMIT 1")
+async def processar_emissao_nfe_batch(
+    conn: asyncpg.Connection,
+    nfe_ids: List[str],
+    service: NFeService
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Processa varias emissoes de NF-e pendentes.
 
-        if not company:
-            return {'success': False, 'error': 'Dados da empresa nao cadastrados'}
+    O numero de idas ao banco nao depende da quantidade de notas: uma
+    consulta para as emissoes, uma para os itens e um executemany por tipo
+    de UPDATE no final.
 
-        # Carrega certificado
-        service.load_certificate(
-            fiscal['certificate_file'],
-            fiscal['certificate_password_encrypted']
-        )
+    Args:
+        conn: Conexao com banco do tenant
+        nfe_ids: IDs das emissoes
+        service: Instancia do NFeService
 
-        # Gera chave de acesso
-        data_emissao = datetime.now(timezone.utc)
-        chave_acesso = service.gerar_chave_acesso(
-            uf=fiscal['uf'],
-            data_emissao=data_emissao,
-            cnpj=company['document'],
-            modelo=nfe['modelo'],
-            serie=nfe['serie'],
-            numero=nfe['numero_nfe'],
-            tipo_emissao=1
-        )
+    Returns:
+        Resultado do processamento por ID de emissao
+    """
+    resultados: Dict[str, Dict[str, Any]] = {}
+    autorizadas = []
+    erros = []
+    # Emissoes que recebem status ERROR se algo falhar fora do laco por nota;
+    # as recusadas na validacao (ex.: ja autorizadas) nao sao tocadas
+    em_processo = list(nfe_ids)
 
-        # Prepara dados para geracao do XML
-        dados_nfe = {
-            'cUF': CODIGO_UF.get(fiscal['uf'], '35'),
-            'cNF': chave_acesso[35:43],
-            'natOp': 'VENDA DE MERCADORIA',
-            'mod': nfe['modelo'],
-            'serie': nfe['serie'],
-            'nNF': nfe['numero_nfe'],
-            'dhEmi': data_emissao.strftime('%Y-%m-%dT%H:%M:%S-03:00'),
-            'tpAmb': fiscal['ambiente'],
-            'cMunFG': fiscal['codigo_municipio'] or '3550308',
-            'tpEmis': 1,
-            'vProd': float(sale['subtotal'] or 0),
-            'vDesc': float(sale['discount_amount'] or 0),
-            'vFrete': float(sale['shipping_amount'] or 0),
-            'vNF': float(sale['total_amount'] or 0),
-            'tPag': '01',  # Dinheiro
-        }
-
-        dados_emitente = {
-            'CNPJ': (company['document'] or '').replace('.', '').replace('/', '').replace('-', ''),
-            'xNome': company['legal_name'] or company['trade_name'] or '',
-            'xFant': company['trade_name'] or '',
-            'xLgr': company['street'] or '',
-            'nro': company['number'] or 'S/N',
-            'xCpl': company['complement'] or '',
-            'xBairro': company['neighborhood'] or '',
-            'cMun': fiscal['codigo_municipio'] or '3550308',
-            'xMun': company['city'] or '',
-            'UF': company['state'] or fiscal['uf'],
-            'CEP': (company['zip_code'] or '').replace('-', ''),
-            'fone': company['phone'] or '',
-            'IE': company['state_registration'] or 'ISENTO',
-            'CRT': fiscal['regime_tributario'] or 1,
-        }
-
-        dados_destinatario = {}
-        if customer:
-            cpf_cnpj = (customer['cpf_cnpj'] or '').replace('.', '').replace('/', '').replace('-', '')
-            if len(cpf_cnpj) == 11:
-                dados_destinatario['CPF'] = cpf_cnpj
+    try:
+        emissoes = {r['id']: r for r in await conn.fetch(_SQL_EMISSOES, nfe_ids)}
+
+        pendentes = []
+        for nfe_id in nfe_ids:
+            nfe = emissoes.get(nfe_id)
+            erro = _validar_emissao(nfe)
+            if erro:
+                resultados[nfe_id] = {'success': False, 'error': erro}
             else:
-                dados_destinatario['CNPJ'] = cpf_cnpj
-
-            nome = customer['company_name'] or customer['trade_name'] or \
-                   f"{customer['first_name'] or ''} {customer['last_name'] or ''}".strip() or 'CONSUMIDOR'
-            dados_destinatario['xNome'] = nome
-            dados_destinatario['xLgr'] = customer['address'] or ''
-            dados_destinatario['nro'] = customer['address_number'] or 'S/N'
-            dados_destinatario['xCpl'] = customer['address_complement'] or ''
-            dados_destinatario['xBairro'] = customer['neighborhood'] or ''
-            dados_destinatario['xMun'] = customer['city'] or ''
-            dados_destinatario['UF'] = customer['state'] or ''
-            dados_destinatario['CEP'] = (customer['zip_code'] or '').replace('-', '')
-
-        # Prepara itens
-        itens_nfe = []
-        for item in items:
-            itens_nfe.append({
-                'cProd': item['product_code'] or str(item['id'])[:60],
-                'xProd': item['product_name'] or 'PRODUTO',
-                'NCM': item['ncm_code'] or '00000000',
-                'CFOP': item['cfop'] or '5102',
-                'uCom': item['unit'] or 'UN',
-                'qCom': float(item['quantity'] or 1),
-                'vUnCom': float(item['unit_price'] or 0),
-                'vProd': float(item['total_amount'] or 0),
-            })
-
-        # Gera XML
-        xml_nfe = service.gerar_xml_nfe(
-            dados_nfe=dados_nfe,
-            dados_emitente=dados_emitente,
-            dados_destinatario=dados_destinatario,
-            itens=itens_nfe,
-            chave_acesso=chave_acesso
-        )
-
-        # Assina XML
-        xml_assinado = service.assinar_xml(xml_nfe)
-
-        # Atualiza registro com XML e chave de acesso
-        await conn.execute("""
-            UPDATE nfe_emissions SET
-                chave_acesso = $1,
-                xml_nfe = $2,
-                tentativas_envio = tentativas_envio + 1,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = $3
-        """, chave_acesso, xml_assinado, nfe_id)
-
-        # TODO: Enviar para SEFAZ via web service
-        # Por enquanto, simula autorizacao em homologacao
-        if fiscal['ambiente'] == 2:  # Homologacao
-            protocolo = f"HOM{datetime.now().strftime('%Y%m%d%H%M%S')}"
-
-            await conn.execute("""
-                UPDATE nfe_emissions SET
-                    status = 'AUTHORIZED',
-                    protocolo_autorizacao = $1,
-                    data_autorizacao = CURRENT_TIMESTAMP,
-                    codigo_retorno = '100',
-                    motivo_retorno = 'Autorizado o uso da NF-e (HOMOLOGACAO)',
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE id = $2
-            """, protocolo, nfe_id)
-
-            return {
+                pendentes.append(nfe)
+        em_processo = [nfe['id'] for nfe in pendentes]
+
+        # Itens de todas as vendas numa consulta, agrupados por venda
+        itens_por_venda: Dict[str, List[asyncpg.Record]] = {}
+        if pendentes:
+            for item in await conn.fetch(
+                _SQL_ITENS_VENDAS, [nfe['venda_id'] for nfe in pendentes]
+            ):
+                itens_por_venda.setdefault(item['sale_id'], []).append(item)
+
+        for nfe in pendentes:
+            nfe_id = nfe['id']
+            try:
+                # Montagem e assinatura sao CPU puro: rodam numa thread para
+                # nao travar o event loop das outras requisicoes
+                chave_acesso, xml_assinado = await asyncio.to_thread(
+                    _gerar_nfe_assinada,
+                    nfe, itens_por_venda.get(nfe['venda_id'], []), service
+                )
+            except Exception as e:
+                logger.exception("Erro ao processar emissao NF-e %s", nfe_id)
+                erros.append((str(e), None, nfe_id))
+                resultados[nfe_id] = {'success': False, 'error': str(e)}
+                continue
+
+            # Homologacao: autorizacao simulada
+            protocolo = f"HOM{_carimbo()}"
+            autorizadas.append((chave_acesso, xml_assinado, protocolo, nfe_id))
+            resultados[nfe_id] = {
                 'success': True,
                 'chave_acesso': chave_acesso,
                 'protocolo': protocolo,
                 'status': 'AUTHORIZED',
                 'message': 'NF-e autorizada em homologacao'
             }
-        else:
-            # Em producao, precisaria enviar para SEFAZ
-            return {
-                'success': False,
-                'error': 'Emissao em producao requer implementacao completa do web service'
-            }
+
+        # XML, chave e autorizacao gravados num unico UPDATE por nota
+        if autorizadas:
+            await conn.executemany(_SQL_AUTORIZA_HOMOLOGACAO, autorizadas)
 
     except Exception as e:
-        logger.error(f"Erro ao processar emissao NF-e: {e}")
-        import traceback
-        traceback.print_exc()
-
-        # Atualiza com erro
-        await conn.execute("""
-            UPDATE nfe_emissions SET
-                status = 'ERROR',
-                ultimo_erro = $1,
-                tentativas_envio = tentativas_envio + 1,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = $2
-        """, str(e), nfe_id)
-
-        return {
-            'success': False,
-            'error': str(e)
-        }
+        logger.exception("Erro ao processar emissao NF-e %s", nfe_ids)
+
+        # Cada nota recebe uma unica escrita: o erro leva junto o XML ja
+        # assinado (se o UPDATE de autorizacao falhou). A chave_acesso fica
+        # de fora: e UNIQUE e pode ser justamente a causa da falha.
+        geradas = {a[3]: a[1] for a in autorizadas}
+        erros = [(str(e), geradas.get(nfe_id), nfe_id) for nfe_id in em_processo]
+        for nfe_id in em_processo:
+            resultados[nfe_id] = {'success': False, 'error': str(e)}
+
+    # Atualiza com erro
+    if erros:
+        await conn.executemany(_SQL_ERRO_EMISSAO, erros)
+
+    return resultados
+
+
+async def processar_emissao_nfe(
+    conn: asyncpg.Connection,
+    nfe_id: str,
+    service: NFeService
+) -> Dict[str, Any]:
+    """
+    Processa a emissao de uma NF-e pendente.
+
+    Args:
+        conn: Conexao com banco do tenant
+        nfe_id: ID da emissao
+        service: Instancia do NFeService
+
+    Returns:
+        Resultado do processamento
+    """
+    resultados = await processar_emissao_nfe_batch(conn, [nfe_id], service)
+    return resultados[nfe_id]
 
 
 # =====================================================
@@ -823,61 +1286,57 @@ class SefazClient:
         """
         self._cert_data = cert_data
         self._cert_password = cert_password
-        self._cert_file = None
-        self._key_file = None
-        self._session = None
+        self._ssl_ctx = None
+        self._http = None
         self._setup_certificate()
 
     def _setup_certificate(self):
-        """Extrai certificado e chave privada para arquivos temporarios."""
+        """Monta o SSLContext (mTLS) do certificado e o cliente HTTP."""
+        import httpx
+        from cryptography.hazmat.primitives.serialization import Encoding, PrivateFormat, NoEncryption
+
         try:
             # Carrega PKCS12
-            private_key, certificate, chain = pkcs12.load_key_and_certificates(
+            private_key, certificate = _load_pkcs12(
                 self._cert_data,
-                self._cert_password.encode() if self._cert_password else None,
-                default_backend()
+                self._cert_password.encode() if self._cert_password else None
             )
 
-            # Cria arquivos temporarios para cert e key
-            self._cert_file = tempfile.NamedTemporaryFile(
-                mode='wb', suffix='.pem', delete=False
-            )
-            self._key_file = tempfile.NamedTemporaryFile(
-                mode='wb', suffix='.pem', delete=False
+            # SSLContext montado uma vez e reaproveitado em todo handshake.
+            # O ssl so le cert/chave de arquivo: o PEM fica em disco apenas
+            # durante o load_cert_chain e e apagado em seguida.
+            ctx = ssl.create_default_context()
+            with tempfile.NamedTemporaryFile(mode='wb', suffix='.pem', delete=False) as pem:
+                pem.write(certificate.public_bytes(Encoding.PEM))
+                pem.write(private_key.private_bytes(
+                    Encoding.PEM,
+                    PrivateFormat.TraditionalOpenSSL,
+                    NoEncryption()
+                ))
+            try:
+                ctx.load_cert_chain(pem.name)
+            finally:
+                os.unlink(pem.name)
+            self._ssl_ctx = ctx
+
+            # Cliente HTTP com o certificado (mTLS). As conexoes ficam no
+            # pool e sao reaproveitadas entre chamadas: o handshake TLS so
+            # acontece na primeira requisicao a cada web service.
+            self._http = httpx.AsyncClient(
+                verify=ctx,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
             )
 
-            # Escreve certificado em PEM
-            self._cert_file.write(certificate.public_bytes(Encoding.PEM))
-            self._cert_file.flush()
-
-            # Escreve chave privada em PEM
-            self._key_file.write(private_key.private_bytes(
-                Encoding.PEM,
-                PrivateFormat.TraditionalOpenSSL,
-                NoEncryption()
-            ))
-            self._key_file.flush()
-
-            # Cria sessao requests com certificado
-            self._session = requests.Session()
-            self._session.cert = (self._cert_file.name, self._key_file.name)
-            self._session.verify = True
-
             logger.info("Certificado SEFAZ configurado com sucesso")
 
         except Exception as e:
             logger.error(f"Erro ao configurar certificado SEFAZ: {e}")
             raise
 
-    def __del__(self):
-        """Limpa arquivos temporarios."""
-        try:
-            if self._cert_file and os.path.exists(self._cert_file.name):
-                os.unlink(self._cert_file.name)
-            if self._key_file and os.path.exists(self._key_file.name):
-                os.unlink(self._key_file.name)
-        except:
-            pass
+    async def aclose(self):
+        """Fecha as conexoes do pool HTTP."""
+        if self._http is not None:
+            await self._http.aclose()
 
     def _criar_envelope_soap(self, xml_content: str) -> str:
         """
@@ -900,7 +1359,7 @@ class SefazClient:
 </soap12:Envelope>"""
         return envelope
 
-    def enviar_lote(self, xml_assinado: str, url: str) -> Dict[str, Any]:
+    async def enviar_lote(self, xml_assinado: str, url: str) -> Dict[str, Any]:
         """
         Envia lote de NF-e para autorizacao.
 
@@ -911,9 +1370,11 @@ class SefazClient:
         Returns:
             Dicionario com resposta da SEFAZ
         """
+        import httpx
+
         try:
             # Cria lote de envio
-            lote_id = datetime.now().strftime('%Y%m%d%H%M%S')
+            lote_id = _carimbo()
 
             # Monta XML do lote
             lote_xml = f"""<enviNFe xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00">
@@ -931,9 +1392,9 @@ class SefazClient:
                 'SOAPAction': 'http://www.portalfiscal.inf.br/nfe/wsdl/NFeAutorizacao4/nfeAutorizacaoLote'
             }
 
-            response = self._session.post(
+            response = await self._http.post(
                 url,
-                data=envelope.encode('utf-8'),
+                content=envelope.encode('utf-8'),
                 headers=headers,
                 timeout=60
             )
@@ -949,13 +1410,14 @@ class SefazClient:
             # Parse da resposta
             return self._parse_resposta_autorizacao(response.text)
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             return {
                 'success': False,
                 'cStat': '999',
                 'xMotivo': 'Timeout na comunicacao com SEFAZ'
             }
-        except requests.exceptions.SSLError as e:
+        except httpx.ConnectError as e:
+            # Inclui falhas de handshake SSL
             return {
                 'success': False,
                 'cStat': '999',
@@ -979,6 +1441,8 @@ class SefazClient:
         Returns:
             Dicionario com dados extraidos
         """
+        from lxml import etree
+
         try:
             # Remove declaracao XML se houver
             if '<?xml' in xml_response:
@@ -1052,7 +1516,7 @@ class SefazClient:
                 'xMotivo': f'Erro no parse: {str(e)}'
             }
 
-    def consultar_protocolo(self, chave_acesso: str, url: str, ambiente: int = 2) -> Dict[str, Any]:
+    async def consultar_protocolo(self, chave_acesso: str, url: str, ambiente: int = 2) -> Dict[str, Any]:
         """
         Consulta protocolo de NF-e na SEFAZ.
 
@@ -1064,6 +1528,8 @@ class SefazClient:
         Returns:
             Dicionario com dados do protocolo
         """
+        from lxml import etree
+
         try:
             # Monta XML de consulta
             cons_xml = f"""<consSitNFe xmlns="http://www.portalfiscal.inf.br/nfe" versao="4.00">
@@ -1088,9 +1554,9 @@ class SefazClient:
                 'SOAPAction': 'http://www.portalfiscal.inf.br/nfe/wsdl/NFeConsultaProtocolo4/nfeConsultaNF'
             }
 
-            response = self._session.post(
+            response = await self._http.post(
                 url,
-                data=envelope.encode('utf-8'),
+                content=envelope.encode('utf-8'),
                 headers=headers,
                 timeout=30
             )
@@ -1123,7 +1589,7 @@ class SefazClient:
                 'xMotivo': str(e)
             }
 
-    def enviar_evento(self, xml_evento: str, url: str) -> Dict[str, Any]:
+    async def enviar_evento(self, xml_evento: str, url: str) -> Dict[str, Any]:
         """
         Envia evento (cancelamento, carta correcao) para SEFAZ.
 
@@ -1134,6 +1600,8 @@ class SefazClient:
         Returns:
             Dicionario com resposta
         """
+        from lxml import etree
+
         try:
             # Cria envelope SOAP
             envelope = f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -1151,9 +1619,9 @@ class SefazClient:
                 'SOAPAction': 'http://www.portalfiscal.inf.br/nfe/wsdl/NFeRecepcaoEvento4/nfeRecepcaoEvento'
             }
 
-            response = self._session.post(
+            response = await self._http.post(
                 url,
-                data=envelope.encode('utf-8'),
+                content=envelope.encode('utf-8'),
                 headers=headers,
                 timeout=30
             )
@@ -1192,6 +1660,81 @@ class SefazClient:
             }
 
 
+# Clientes que saem do cache sao fechados depois desse prazo: uma chamada
+# que pegou o cliente antes de expirar ainda termina (timeout maximo 60s)
+SEFAZ_CLIENT_CLOSE_DELAY = 90
+
+# Clientes ainda nao fechados (inclusive os que ja sairam do cache) e os
+# fechamentos agendados, com referencia para o task nao ser coletado
+_sefaz_abertos: set = set()
+_sefaz_fechamentos: set = set()
+
+
+async def _fechar_sefaz_client(client: 'SefazClient', atraso: float):
+    await asyncio.sleep(atraso)
+    _sefaz_abertos.discard(client)
+    try:
+        await client.aclose()
+    except Exception as e:
+        logger.warning(f"Erro ao fechar cliente SEFAZ: {e}")
+
+
+def _agendar_fechamento(client: 'SefazClient'):
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # sem event loop: close_sefaz_clients fecha no shutdown
+    task = loop.create_task(_fechar_sefaz_client(client, SEFAZ_CLIENT_CLOSE_DELAY))
+    _sefaz_fechamentos.add(task)
+    task.add_done_callback(_sefaz_fechamentos.discard)
+
+
+class _SefazClientCache(TTLCache):
+    """TTLCache que fecha (aclose) os clientes que saem por TTL ou por LRU"""
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for _, client in expired:
+            _agendar_fechamento(client)
+        return expired
+
+    def popitem(self):
+        key, client = super().popitem()
+        _agendar_fechamento(client)
+        return key, client
+
+
+# Clientes SEFAZ por certificado: mantem o pool de conexoes e o
+# SSLContext entre as chamadas, em vez de um cliente novo por evento.
+# Mesma chave e TTL do cache de certificados.
+_SEFAZ_CLIENTS: TTLCache = _SefazClientCache(maxsize=64, ttl=3600)
+
+
+def get_sefaz_client(cert_data: bytes, cert_password: str) -> SefazClient:
+    """Retorna o SefazClient do certificado, criando na primeira chamada"""
+    cache_key = hashlib.blake2b(
+        cert_data + b'\0' + (cert_password or '').encode(), digest_size=16
+    ).digest()
+    client = _SEFAZ_CLIENTS.get(cache_key)
+    if client is None:
+        client = _SEFAZ_CLIENTS[cache_key] = SefazClient(cert_data, cert_password)
+        _sefaz_abertos.add(client)
+    return client
+
+
+async def close_sefaz_clients():
+    """Fecha todos os clientes SEFAZ (shutdown), sem esperar os prazos"""
+    for task in list(_sefaz_fechamentos):
+        task.cancel()
+    clients = list(_sefaz_abertos)
+    _sefaz_abertos.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Erro ao fechar cliente SEFAZ: {e}")
+
+
 # =====================================================
 # GERACAO DE DANFE (PDF)
 # =====================================================
@@ -1456,13 +1999,13 @@ def gerar_xml_cancelamento(
     if len(justificativa) < 15:
         justificativa = justificativa.ljust(15)
 
-    data_evento = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S-03:00')
+    data_evento = _data_hora_sefaz(datetime.now(_UTC))
     seq_evento = '1'
     id_evento = f"ID110111{chave_acesso}{seq_evento.zfill(2)}"
     cOrgao = chave_acesso[:2]  # Codigo UF
 
     xml = f"""<envEvento xmlns="http://www.portalfiscal.inf.br/nfe" versao="1.00">
-    <idLote>{datetime.now().strftime('%Y%m%d%H%M%S')}</idLote>
+    <idLote>{_carimbo()}</idLote>
     <evento xmlns="http://www.portalfiscal.inf.br/nfe" versao="1.00">
         <infEvento Id="{id_evento}">
             <cOrgao>{cOrgao}</cOrgao>
@@ -1511,7 +2054,7 @@ def gerar_xml_carta_correcao(
     if len(texto_correcao) > 1000:
         texto_correcao = texto_correcao[:1000]
 
-    data_evento = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S-03:00')
+    data_evento = _data_hora_sefaz(datetime.now(_UTC))
     id_evento = f"ID110110{chave_acesso}{str(sequencia).zfill(2)}"
     cOrgao = chave_acesso[:2]
 
@@ -1525,7 +2068,7 @@ def gerar_xml_carta_correcao(
                     "III - a data de emissao ou de saida.")
 
     xml = f"""<envEvento xmlns="http://www.portalfiscal.inf.br/nfe" versao="1.00">
-    <idLote>{datetime.now().strftime('%Y%m%d%H%M%S')}</idLote>
+    <idLote>{_carimbo()}</idLote>
     <evento xmlns="http://www.portalfiscal.inf.br/nfe" versao="1.00">
         <infEvento Id="{id_evento}">
             <cOrgao>{cOrgao}</cOrgao>
@@ -1607,7 +2150,7 @@ async def processar_cancelamento_nfe(
 
         # Busca CNPJ da empresa
         company = await conn.fetchrow("SELECT document FROM companies LIMIT 1")
-        cnpj = (company['document'] or '').replace('.', '').replace('/', '').replace('-', '')
+        cnpj = (company['document'] or '').translate(_DOC_TRANS)
 
         # Gera XML de cancelamento
         xml_cancelamento = gerar_xml_cancelamento(
@@ -1627,7 +2170,7 @@ async def processar_cancelamento_nfe(
 
         # Em homologacao, simula sucesso
         if nfe['ambiente'] == 2:
-            protocolo_cancel = f"CANC{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            protocolo_cancel = f"CANC{_carimbo()}"
 
             await conn.execute("""
                 UPDATE nfe_emissions SET
@@ -1651,13 +2194,13 @@ async def processar_cancelamento_nfe(
         if not url:
             return {'success': False, 'error': 'URL do servico nao encontrada'}
 
-        # Cria cliente SEFAZ
-        client = SefazClient(
+        # Cliente SEFAZ do certificado (reaproveitado entre chamadas)
+        client = get_sefaz_client(
             fiscal['certificate_file'],
             service._decrypt_password(fiscal['certificate_password_encrypted'])
         )
 
-        result = client.enviar_evento(xml_assinado, url)
+        result = await client.enviar_evento(xml_assinado, url)
 
         if result.get('success'):
             await conn.execute("""
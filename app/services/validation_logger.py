@@ -0,0 +1,113 @@
+"""
+License Server - Validation Logger
+Grava o histórico de validações (LicenseValidation) em lote.
+
+Ativações e heartbeats não fazem mais um INSERT + commit cada: os endpoints
+enfileiram a linha e este módulo, em background:
+1. A cada 250ms esvazia a fila
+2. Grava em INSERTs de até 500 linhas, uma transação por lote
+3. Atualiza last_validated_at/last_heartbeat_at das licenças num só UPDATE
+4. No shutdown grava o que ainda estiver pendente
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam
+
+from app.database import AsyncSessionLocal
+from app.models.license import License, LicenseValidation
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL_SECONDS = 0.25
+BATCH_SIZE = 500
+QUEUE_MAXSIZE = 10000
+
+_queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
+_insert = LicenseValidation.__table__.insert()
+
+# Último heartbeat por licença; vários heartbeats no intervalo viram um UPDATE
+_heartbeats: Dict[str, datetime] = {}
+_licenses = License.__table__
+_touch = (
+    _licenses.update()
+    .where(_licenses.c.id == bindparam("b_id"))
+    .values(last_validated_at=bindparam("b_at"), last_heartbeat_at=bindparam("b_at"))
+)
+
+
+async def log_validation(
+    license_id: str,
+    ip_address: str,
+    user_agent: str,
+    hardware_id: Optional[str],
+    validation_type: str,
+    success: bool = True,
+    error_message: Optional[str] = None,
+):
+    """Enfileira uma validação para gravação em lote"""
+    # created_at é do momento da validação, não do momento do flush.
+    # Todas as chaves sempre presentes: o executemany compila pelo 1º dict.
+    await _queue.put({
+        "license_id": license_id,
+        "ip_address": ip_address,
+        "user_agent": user_agent,
+        "hardware_id": hardware_id,
+        "validation_type": validation_type,
+        "success": success,
+        "error_message": error_message,
+        "created_at": datetime.utcnow(),
+    })
+
+
+def touch_heartbeat(license_id: str, at: datetime):
+    """Marca o heartbeat da licença (gravado no próximo flush)"""
+    _heartbeats[license_id] = at
+
+
+async def _flush_heartbeats():
+    global _heartbeats
+    if not _heartbeats:
+        return
+    pending, _heartbeats = _heartbeats, {}
+    try:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                _touch, [{"b_id": lid, "b_at": at} for lid, at in pending.items()]
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"[VALIDATION-LOGGER] Erro ao atualizar {len(pending)} heartbeats: {e}")
+
+
+async def flush_pending() -> int:
+    """Grava todas as validações pendentes. Retorna quantas foram gravadas."""
+    await _flush_heartbeats()
+    total = 0
+    while not _queue.empty():
+        batch = []
+        while len(batch) < BATCH_SIZE and not _queue.empty():
+            batch.append(_queue.get_nowait())
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(_insert, batch)
+                await db.commit()
+            total += len(batch)
+        except Exception as e:
+            logger.error(f"[VALIDATION-LOGGER] Erro ao gravar {len(batch)} validacoes: {e}")
+    return total
+
+
+async def run_validation_logger():
+    """Loop principal: grava a fila periodicamente"""
+    logger.info("[VALIDATION-LOGGER] Iniciado (flush a cada %.2fs)", FLUSH_INTERVAL_SECONDS)
+    try:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            await flush_pending()
+    except asyncio.CancelledError:
+        await flush_pending()
+        raise
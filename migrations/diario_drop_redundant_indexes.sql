@@ -0,0 +1,20 @@
+-- =====================================================================
+-- MIGRACAO: remove indices redundantes do Diario
+-- =====================================================================
+-- idx_tags_user (user_id) e idx_tags_slug (user_id, slug) duplicam o indice
+-- criado pelo UNIQUE(user_id, slug) da tabela tags.
+-- idx_diary_entries_user (user_id) e prefixo de idx_diary_entries_user_date.
+--
+-- Indices redundantes custam escrita em todo INSERT/UPDATE/DELETE e ocupam
+-- buffer cache sem ajudar nenhuma consulta.
+--
+-- Idempotente. DROP INDEX CONCURRENTLY nao pode rodar dentro de transacao:
+-- executar com psql direto (sem BEGIN/COMMIT).
+--
+-- COMO EXECUTAR (para CADA tenant do Diario):
+--   docker exec license-db psql -U license_admin -d cliente_XXXX -f /tmp/diario_drop_redundant_indexes.sql
+-- =====================================================================
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_tags_user;
+DROP INDEX CONCURRENTLY IF EXISTS idx_tags_slug;
+DROP INDEX CONCURRENTLY IF EXISTS idx_diary_entries_user;
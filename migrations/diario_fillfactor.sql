@@ -0,0 +1,32 @@
+-- =====================================================================
+-- MIGRACAO: fillfactor 85 nas tabelas do Diario com UPDATE frequente
+-- =====================================================================
+-- diary_entries, tags, writing_prompts e user_streaks sao atualizadas com
+-- frequencia (updated_at, usage_count, times_used, current_streak). Com
+-- fillfactor 85 sobra espaco na pagina para HOT updates, que nao precisam
+-- reescrever os indices quando colunas nao indexadas mudam.
+--
+-- Tenants novos ja nascem assim (DIARIO_SCHEMA_SQL). Este script ajusta
+-- os bancos existentes. O ALTER so vale para paginas novas; o VACUUM FULL
+-- reescreve a tabela (LOCK exclusivo - rodar fora do horario de uso).
+--
+-- Idempotente.
+--
+-- COMO EXECUTAR (para CADA tenant do Diario):
+--   docker exec license-db psql -U license_admin -d cliente_XXXX -f /tmp/diario_fillfactor.sql
+-- =====================================================================
+
+ALTER TABLE diary_entries   SET (fillfactor = 85);
+ALTER TABLE tags            SET (fillfactor = 85);
+ALTER TABLE writing_prompts SET (fillfactor = 85);
+ALTER TABLE user_streaks    SET (fillfactor = 85);
+
+-- Reescreve as paginas existentes com o novo fillfactor
+VACUUM FULL diary_entries;
+VACUUM FULL tags;
+VACUUM FULL writing_prompts;
+VACUUM FULL user_streaks;
+
+-- Agrupa as entradas pelo padrao de acesso (usuario + data)
+CLUSTER diary_entries USING idx_diary_entries_user_date;
+ANALYZE diary_entries;
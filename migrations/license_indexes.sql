@@ -0,0 +1,32 @@
+-- =====================================================================
+-- MIGRACAO: indices de consulta para licenses e license_validations
+-- =====================================================================
+-- ix_licenses_status_expires (status, expires_at): a validacao e o painel
+-- filtram status = 'active' junto com expires_at; com so o indice de status
+-- o Postgres varria todas as licencas ativas para depois filtrar a data.
+-- ix_licenses_client_status (client_id, status): listagens por cliente.
+-- ix_licenses_status (so status) sai: status e a primeira coluna de
+-- ix_licenses_status_expires, que ja atende os filtros so por status.
+-- ix_validations_created_brin: license_validations so recebe INSERT em ordem
+-- de tempo; BRIN em created_at ocupa uma fracao de um B-tree.
+--
+-- Idempotente. CREATE INDEX CONCURRENTLY nao bloqueia escrita, mas nao pode
+-- rodar dentro de transacao: executar com psql direto (sem BEGIN/COMMIT).
+--
+-- COMO EXECUTAR (banco principal do License Server):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/license_indexes.sql
+-- =====================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_status_expires
+    ON licenses (status, expires_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_client_status
+    ON licenses (client_id, status);
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_licenses_status;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_validations_created_brin
+    ON license_validations USING brin (created_at);
+
+ANALYZE licenses;
+ANALYZE license_validations;
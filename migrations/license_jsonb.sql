@@ -0,0 +1,37 @@
+-- =====================================================================
+-- MIGRACAO: colunas JSON do License Server para JSONB
+-- =====================================================================
+-- As colunas JSON eram gravadas como texto e re-parseadas a cada leitura.
+-- JSONB e binario (parse unico no INSERT) e aceita indice GIN: o filtro
+-- features @> '["premium_support"]' passa a usar ix_licenses_features_gin.
+--
+-- O ALTER TYPE reescreve as tabelas (lock exclusivo): rodar fora do pico.
+-- O CREATE INDEX CONCURRENTLY fica fora da transacao.
+--
+-- COMO EXECUTAR (banco principal do License Server, ANTES do deploy):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/license_jsonb.sql
+-- =====================================================================
+
+BEGIN;
+
+ALTER TABLE clients
+    ALTER COLUMN metadata TYPE JSONB USING metadata::jsonb;
+
+ALTER TABLE licenses
+    ALTER COLUMN hardware_info TYPE JSONB USING hardware_info::jsonb,
+    ALTER COLUMN features      TYPE JSONB USING features::jsonb,
+    ALTER COLUMN metadata      TYPE JSONB USING metadata::jsonb;
+
+ALTER TABLE subscription_plans
+    ALTER COLUMN metadata TYPE JSONB USING metadata::jsonb;
+
+ALTER TABLE payment_transactions
+    ALTER COLUMN webhook_data TYPE JSONB USING webhook_data::jsonb;
+
+ALTER TABLE tenants
+    ALTER COLUMN metadata TYPE JSONB USING metadata::jsonb;
+
+COMMIT;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_features_gin
+    ON licenses USING gin (features);
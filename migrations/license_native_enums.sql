@@ -0,0 +1,46 @@
+-- =====================================================================
+-- MIGRACAO: status de licenses e tenants como ENUM nativo do Postgres
+-- =====================================================================
+-- licenses.status e tenants.status eram VARCHAR(20). Como ENUM cada valor
+-- ocupa 4 bytes, os indices encolhem e a comparacao deixa de ser de texto.
+-- Os models usam os mesmos valores em minusculo (LicenseStatus/TenantStatus).
+--
+-- plan e payment_transactions.status continuam VARCHAR: recebem valores
+-- fora dos enums (ex.: plano "premium", status cru do Mercado Pago).
+--
+-- Antes de rodar, confira que nao ha valores fora da lista:
+--   SELECT DISTINCT status FROM licenses;
+--   SELECT DISTINCT status FROM tenants;
+-- O ALTER TYPE reescreve a tabela (lock exclusivo): rodar fora do pico.
+--
+-- COMO EXECUTAR (banco principal do License Server, ANTES do deploy):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/license_native_enums.sql
+-- =====================================================================
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'license_status') THEN
+        CREATE TYPE license_status AS ENUM (
+            'pending', 'active', 'expired', 'suspended', 'revoked'
+        );
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'tenant_status') THEN
+        CREATE TYPE tenant_status AS ENUM (
+            'pending', 'provisioning', 'active', 'suspended',
+            'trial', 'trial_expired', 'cancelled', 'error'
+        );
+    END IF;
+END $$;
+
+ALTER TABLE licenses
+    ALTER COLUMN status TYPE license_status USING status::license_status;
+
+ALTER TABLE tenants
+    ALTER COLUMN status TYPE tenant_status USING status::tenant_status;
+
+COMMIT;
+
+ANALYZE licenses;
+ANALYZE tenants;
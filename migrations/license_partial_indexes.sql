@@ -0,0 +1,24 @@
+-- =====================================================================
+-- MIGRACAO: indices parciais para os filtros de status mais usados
+-- =====================================================================
+-- status tem poucos valores distintos; um B-tree completo nele seleciona
+-- quase a tabela toda. Indices parciais cobrem so as linhas do filtro
+-- quente e ficam bem menores:
+--   ix_licenses_active_expires  licenses(expires_at)            status = 'active'
+--   ix_payments_pending         payment_transactions(created_at) status = 'pending'
+--   ix_tenants_active           tenants(product_code)           status = 'active'
+--
+-- Idempotente. CREATE INDEX CONCURRENTLY nao pode rodar dentro de transacao.
+--
+-- COMO EXECUTAR (banco principal do License Server):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/license_partial_indexes.sql
+-- =====================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_licenses_active_expires
+    ON licenses (expires_at) WHERE status = 'active';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_payments_pending
+    ON payment_transactions (created_at) WHERE status = 'pending';
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tenants_active
+    ON tenants (product_code) WHERE status = 'active';
@@ -0,0 +1,46 @@
+-- =====================================================================
+-- MIGRACAO: updated_at calculado pelo banco
+-- =====================================================================
+-- Os models trocaram onupdate=datetime.utcnow (parametro a mais em todo
+-- UPDATE) por server_default/onupdate TIMEZONE('utc', CURRENT_TIMESTAMP).
+-- Este script:
+--   1. Define o DEFAULT de updated_at nas tabelas ja existentes
+--   2. Cria UMA funcao set_updated_at() e a liga em todas as tabelas, para
+--      que UPDATEs em massa (update(License).values(...), psql) tambem
+--      atualizem o updated_at
+--
+-- Idempotente (CREATE OR REPLACE / DROP TRIGGER IF EXISTS).
+--
+-- COMO EXECUTAR (banco principal do License Server, ANTES do deploy):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/license_updated_at_trigger.sql
+-- =====================================================================
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at := TIMEZONE('utc', CURRENT_TIMESTAMP);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY[
+        'admin_users', 'clients', 'licenses',
+        'subscription_plans', 'payment_transactions', 'tenants'
+    ] LOOP
+        EXECUTE format(
+            'ALTER TABLE %I ALTER COLUMN updated_at SET DEFAULT TIMEZONE(''utc'', CURRENT_TIMESTAMP)', t
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_updated_at ON %I', t, t);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_updated_at BEFORE UPDATE ON %I '
+            'FOR EACH ROW EXECUTE FUNCTION set_updated_at()', t, t
+        );
+    END LOOP;
+END $$;
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- =====================================================================
+-- MIGRACAO: UUID das chaves primarias gerado pelo Postgres
+-- =====================================================================
+-- Os models passaram a declarar server_default gen_random_uuid()::text no
+-- id (o INSERT nao envia mais o id; o valor volta via RETURNING). Tabelas
+-- criadas antes pelo create_all nao tem esse DEFAULT: sem esta migracao o
+-- INSERT falha com id NULL.
+--
+-- gen_random_uuid() e nativo a partir do PostgreSQL 13.
+-- Idempotente (SET DEFAULT pode ser repetido).
+--
+-- COMO EXECUTAR (banco principal do License Server, ANTES do deploy):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/license_uuid_server_default.sql
+-- =====================================================================
+
+ALTER TABLE clients              ALTER COLUMN id SET DEFAULT gen_random_uuid()::text;
+ALTER TABLE licenses             ALTER COLUMN id SET DEFAULT gen_random_uuid()::text;
+ALTER TABLE license_validations  ALTER COLUMN id SET DEFAULT gen_random_uuid()::text;
+ALTER TABLE admin_users          ALTER COLUMN id SET DEFAULT gen_random_uuid()::text;
+ALTER TABLE tenants              ALTER COLUMN id SET DEFAULT gen_random_uuid()::text;
+ALTER TABLE subscription_plans   ALTER COLUMN id SET DEFAULT gen_random_uuid()::text;
+ALTER TABLE payment_transactions ALTER COLUMN id SET DEFAULT gen_random_uuid()::text;
@@ -0,0 +1,23 @@
+-- =====================================================================
+-- MIGRACAO: indice de sale_items por venda (emissao de NF-e)
+-- =====================================================================
+-- A emissao de NF-e le os itens de todas as vendas do lote com
+-- sale_id = ANY($1). As demais buscas da emissao ja vao por chave
+-- primaria (nfe_emissions.id, sales.id, customers.id) ou leem tabelas de
+-- uma linha (fiscal_settings, companies).
+--
+-- Tenants criados por app/core/tenant_schema.py ja tem idx_sale_item_sale;
+-- este script usa o mesmo nome para que o IF NOT EXISTS nao crie um
+-- segundo indice igual ali, e so cubra bancos antigos ou criados por
+-- outro caminho (ensure_sales_and_quotations_schema), que nao o tem.
+--
+-- Idempotente. CREATE INDEX CONCURRENTLY nao pode rodar dentro de transacao.
+--
+-- COMO EXECUTAR (para CADA tenant com NF-e):
+--   docker exec license-db psql -U license_admin -d cliente_XXXX -f /tmp/nfe_sale_items_index.sql
+-- =====================================================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sale_item_sale
+    ON sale_items (sale_id);
+
+ANALYZE sale_items;
@@ -0,0 +1,25 @@
+-- =====================================================================
+-- MIGRACAO: valores monetarios de FLOAT para NUMERIC
+-- =====================================================================
+-- subscription_plans.price/original_price e payment_transactions.amount
+-- eram double precision: cada leitura/escrita passava por float <-> Decimal
+-- e SUM(amount) acumulava erro de arredondamento. Agora NUMERIC(12,2);
+-- discount_percent vira NUMERIC(5,2), como nos bancos dos tenants.
+--
+-- Reescreve as tabelas (lock exclusivo), mas ambas sao pequenas.
+--
+-- COMO EXECUTAR (banco principal do License Server, ANTES do deploy):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/subscription_numeric_money.sql
+-- =====================================================================
+
+BEGIN;
+
+ALTER TABLE subscription_plans
+    ALTER COLUMN price            TYPE NUMERIC(12,2) USING round(price::numeric, 2),
+    ALTER COLUMN original_price   TYPE NUMERIC(12,2) USING round(original_price::numeric, 2),
+    ALTER COLUMN discount_percent TYPE NUMERIC(5,2)  USING round(discount_percent::numeric, 2);
+
+ALTER TABLE payment_transactions
+    ALTER COLUMN amount TYPE NUMERIC(12,2) USING round(amount::numeric, 2);
+
+COMMIT;
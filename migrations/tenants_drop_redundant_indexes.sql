@@ -0,0 +1,17 @@
+-- =====================================================================
+-- MIGRACAO: remove indices redundantes de tenants
+-- =====================================================================
+-- ix_tenants_document, ix_tenants_email e ix_tenants_tenant_code sao
+-- prefixos das uniques (document, product_code), (email, product_code) e
+-- (tenant_code, product_code): as buscas por essas colunas ja usam o indice
+-- da unique. Cada INSERT/UPDATE mantinha 8 indices; passam a ser 5 (+ PK).
+--
+-- Idempotente. DROP INDEX CONCURRENTLY nao pode rodar dentro de transacao.
+--
+-- COMO EXECUTAR (banco principal do License Server):
+--   docker exec license-db psql -U license_admin -d license_server -f /tmp/tenants_drop_redundant_indexes.sql
+-- =====================================================================
+
+DROP INDEX CONCURRENTLY IF EXISTS ix_tenants_document;
+DROP INDEX CONCURRENTLY IF EXISTS ix_tenants_email;
+DROP INDEX CONCURRENTLY IF EXISTS ix_tenants_tenant_code;